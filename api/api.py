@@ -5,6 +5,8 @@ from quart import Blueprint, jsonify, request, abort
 from quart import current_app as app
 from quart_cors import cors
 
+from bot import watch_stats
+
 api = Blueprint("api", __name__)
 api = cors(api)
 
@@ -28,6 +30,30 @@ class Item:
         item.wearable = await redis.hget(item.redis_key, "wearable") or "0"
         return item
 
+    @staticmethod
+    async def many_from_redis(redis, uuids):
+        uuids = list(uuids)
+        if not uuids:
+            return []
+
+        pipe = redis.pipeline()
+        for uuid in uuids:
+            pipe.hgetall(f"items:{uuid}")
+
+        items = []
+        for uuid, fields in zip(uuids, await pipe.execute()):
+            item = Item()
+            item.uuid = uuid
+
+            item.name = fields.get("name")
+            item.guild = int(fields.get("guild") or "0")
+            item.owner = int(fields.get("owner") or "0")
+            item.desc = fields.get("desc")
+            item.wearable = fields.get("wearable") or "0"
+            items.append(item)
+
+        return items
+
 
 @api.route("/status")
 async def status():
@@ -46,6 +72,16 @@ async def status():
     })
 
 
+@api.route("/watches")
+async def watches():
+    stats = {}
+
+    for name in await app.redis.smembers("watch:list"):
+        stats[name] = await watch_stats.get_stats(app.redis, name)
+
+    return jsonify(stats)
+
+
 @api.route("/guild")
 async def guild():
     guild_id = request.args.get("id")
@@ -79,22 +115,37 @@ async def richest():
     if not website_enabled:
         return []
 
-    balances = []
-
-    guild_members = await app.redis.smembers(f"guild:member:{guild_id}")
-    for member_id in guild_members:
-        balance = int(await app.redis.get(
-            f"currency:balance:{guild_id}:{member_id}") or 0)
-        member_name = await app.redis.get(
-            f"user:name:{guild_id}:{member_id}")
-        balances.append({
-            "balance": balance,
-            "name": member_name,
-            "id": member_id
-        })
-
-    richest_members = sorted(
-        balances, key=lambda a: a["balance"], reverse=True)
+    try:
+        page = int(request.args.get("page") or 0)
+        per_page = min(int(request.args.get("per_page") or 100), 1000)
+    except ValueError:
+        return abort(400)
+    if page < 0 or per_page < 1:
+        return abort(400)
+    start = page * per_page
+
+    balances = await app.redis.zrevrange(
+        f"currency:richest:{guild_id}", start, start + per_page - 1,
+        withscores=True)
+
+    if not balances:
+        return jsonify([])
+
+    pipe = app.redis.pipeline()
+    for member_id, _ in balances:
+        pipe.sismember(f"guild:member:{guild_id}", member_id)
+        pipe.get(f"user:name:{guild_id}:{member_id}")
+    results = await pipe.execute()
+
+    # Leave out anyone who left without the leaderboard hearing about it
+    richest_members = [{
+        "balance": int(balance),
+        "name": name,
+        "id": member_id,
+        "rank": start + index + 1
+    } for index, ((member_id, balance), is_member, name)
+        in enumerate(zip(balances, results[0::2], results[1::2]))
+        if is_member]
 
     return jsonify(richest_members)
 
@@ -111,16 +162,19 @@ async def shop():
     if not website_enabled:
         return []
 
-    shop_item_ids = await app.redis.smembers(f"shop:items:{guild_id}")
+    shop_item_ids = list(await app.redis.smembers(f"shop:items:{guild_id}"))
 
     shop_items = []
 
-    for item_id in shop_item_ids:
-        price = int(await app.redis.get(
-            f"shop:prices:{guild_id}:{item_id}"))
-        item = await Item.from_redis(app.redis, item_id)
-        item.price = price
-        shop_items.append(vars(item))
+    if shop_item_ids:
+        prices = await app.redis.mget(
+            *(f"shop:prices:{guild_id}:{item_id}"
+              for item_id in shop_item_ids))
+
+        for item, price in zip(
+                await Item.many_from_redis(app.redis, shop_item_ids), prices):
+            item.price = int(price)
+            shop_items.append(vars(item))
 
     return jsonify(shop_items)
 
@@ -158,16 +212,16 @@ async def profile():
 
     inventory = await app.redis.hgetall(f"inventory:{guild_id}:{member_id}")
 
+    inventory = {uuid: amount for uuid, amount in inventory.items()
+                 if int(amount) > 0}
+
     amounts = []
-    for item_name, amount in inventory.items():
-        item = await Item.from_redis(app.redis, item_name)
-        item.quantity = amount
-        if int(amount) > 0:
-            amounts.append(vars(item))
-
-    wearing = [vars(await Item.from_redis(app.redis, uuid))
-               for uuid
-               in await app.redis.smembers(f"wear:{guild_id}:{member_id}")]
+    for item in await Item.many_from_redis(app.redis, inventory.keys()):
+        item.quantity = inventory[item.uuid]
+        amounts.append(vars(item))
+
+    wearing = [vars(item) for item in await Item.many_from_redis(
+        app.redis, await app.redis.smembers(f"wear:{guild_id}:{member_id}"))]
 
     return jsonify({
         "name": user_name,
@@ -1,6 +1,8 @@
 import json
 import asyncio
 import os
+import time
+import uuid
 
 import aioredis
 from quart import Blueprint, websocket
@@ -9,6 +11,22 @@ from quart import current_app as app
 
 portal_server = Blueprint("portal", __name__)
 
+# Consumer group that API instances read portal:<id>:jobs streams as
+JOB_GROUP = "api"
+
+# Jobs read from a stream at once
+JOB_BATCH = 10
+
+# Milliseconds a delivered job can go unanswered before another connection
+# of the portal may take it over
+CLAIM_IDLE = 30 * 1000
+
+# Seconds after which the bot has given up on a job
+JOB_TTL = 120
+
+# Approximate number of responses to keep in portal:replies
+MAX_REPLIES = 1000
+
 
 async def auth_portal(auth_info):
     id = auth_info["id"]
@@ -24,7 +42,7 @@ async def auth_portal(auth_info):
     return await app.redis.hgetall(f"portal:{id}")
 
 
-async def receive_portal(portal):
+async def receive_portal(portal, consumer):
     id = portal["id"]
 
     while True:
@@ -34,20 +52,112 @@ async def receive_portal(portal):
             job = message["job"]
             message["portal"] = id
 
-            await app.redis.publish_json(f"portal:{id}:{job}", message)
+            entry_id = await app.redis.hget(f"portal:{id}:inflight", job)
+
+            pipe = app.redis.pipeline()
+            pipe.xadd("portal:replies", {"response": json.dumps(message)},
+                      max_len=MAX_REPLIES)
+            if entry_id:
+                pipe.xack(f"portal:{id}:jobs", JOB_GROUP, entry_id)
+                pipe.hdel(f"portal:{id}:inflight", job)
+            await pipe.execute()
 
         elif message["type"] == "status":
             status = message["status"]
             await app.redis.hset(f"portal:{id}", "status", status)
 
+        elif message["type"] == "resume":
+            await resume_jobs(id, consumer, message["jobs"])
+
+
+async def resume_jobs(portal_id, consumer, running):
+    """Take over every job pending for a reconnected portal right away.
+
+    Jobs the portal is still working on are left with it, and will be
+    acknowledged once it responds. The rest are delivered again."""
+
+    stream = f"portal:{portal_id}:jobs"
+
+    pending = await app.redis.xpending(stream, JOB_GROUP, "-", "+", 100)
+    ids = [entry_id for entry_id, owner, _, _ in pending if owner != consumer]
+    if not ids:
+        return
+
+    inflight = await app.redis.hgetall(f"portal:{portal_id}:inflight")
+    running = {inflight[job] for job in running if job in inflight}
+
+    for entry_id, fields in await app.redis.xclaim(
+            stream, JOB_GROUP, consumer, 0, *ids):
+        if entry_id not in running:
+            await send_job(portal_id, stream, entry_id,
+                           json.loads(fields["query"]))
+
+
+async def claim_jobs(stream, consumer):
+    "Take over jobs that another connection received but never answered."
+    pending = await app.redis.xpending(stream, JOB_GROUP, "-", "+", JOB_BATCH)
+
+    ids = [entry_id for entry_id, owner, idle, _ in pending
+           if owner != consumer and idle >= CLAIM_IDLE]
+    if not ids:
+        return []
 
-async def send_portal(portal):
-    sub_conn = await aioredis.create_redis(
+    return await app.redis.xclaim(
+        stream, JOB_GROUP, consumer, CLAIM_IDLE, *ids)
+
+
+async def send_job(portal_id, stream, entry_id, query):
+    if time.time() - query.get("time", 0) > JOB_TTL:
+        await app.redis.xack(stream, JOB_GROUP, entry_id)
+        return
+
+    await app.redis.hset(
+        f"portal:{portal_id}:inflight", query["job"], entry_id)
+    await websocket.send(json.dumps(query))
+
+
+async def create_group(portal):
+    try:
+        await app.redis.xgroup_create(f"portal:{portal['id']}:jobs",
+                                      JOB_GROUP, latest_id="0", mkstream=True)
+    except aioredis.ReplyError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+async def send_portal(portal, consumer):
+    """Deliver jobs from the portal's stream to its websocket.
+
+    Jobs stay pending in the consumer group until the portal responds, so
+    a job sent while the portal was disconnected, or to a connection that
+    dropped before answering, is delivered again once it reconnects."""
+
+    id = portal["id"]
+    stream = f"portal:{id}:jobs"
+
+    # Blocking reads would tie up a connection of the shared pool
+    conn = await aioredis.create_redis(
         os.getenv("REDIS_URL"), encoding="utf-8")
-    channel = (await sub_conn.psubscribe(f"portal:{portal['id']}:*"))[0]
-    async for _, message in channel.iter(decoder=json.loads):
-        if message["type"] == "query":
-            await websocket.send(json.dumps(message))
+
+    try:
+        while True:
+            jobs = await claim_jobs(stream, consumer)
+            jobs += [(entry_id, fields) for _, entry_id, fields in
+                     await conn.xread_group(
+                         JOB_GROUP, consumer, [stream],
+                         timeout=CLAIM_IDLE // 2, count=JOB_BATCH,
+                         latest_ids=[">"])]
+
+            for entry_id, fields in jobs:
+                await send_job(id, stream, entry_id,
+                               json.loads(fields["query"]))
+    finally:
+        conn.close()
+
+        # Leave the consumer in the group if it still has jobs to hand over
+        if not await app.redis.xpending(
+                stream, JOB_GROUP, "-", "+", 1, consumer):
+            await app.redis.xgroup_delconsumer(stream, JOB_GROUP, consumer)
 
 
 async def maintain_ping(portal):
@@ -68,8 +178,12 @@ async def portal_requests():
         websocket.close()
         return
 
-    receive = receive_portal(portal)
-    send = send_portal(portal)
+    # Each connection reads the portal's jobs as its own consumer
+    consumer = str(uuid.uuid4())
+    await create_group(portal)
+
+    receive = receive_portal(portal, consumer)
+    send = send_portal(portal, consumer)
     ping = maintain_ping(portal)
 
     try:
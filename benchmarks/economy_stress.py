@@ -0,0 +1,137 @@
+# Stress test for the wallet and inventory scripts. Runs random payments,
+# purchases, gifts and bets from many concurrent tasks against the Redis at
+# REDIS_URL, then checks that no balance or item count went negative and that
+# the leaderboard matches the balances.
+#
+# Usage: python -m benchmarks.economy_stress [users] [tasks] [operations]
+#
+# Everything is written under a throwaway guild ID, which is cleaned up
+# afterwards.
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+import aioredis
+from discord.ext import commands
+
+from bot.economy.itemlib import Inventory, Item, Wallet
+
+
+GUILD = "stress"
+
+# Starting balance and item count of each user
+COINS = 100
+ITEMS = 10
+
+# Shop price of the item, so that purchases can fail for lack of funds
+PRICE = 7
+
+
+async def setup(redis, users, item):
+    pipe = redis.pipeline()
+    for user in users:
+        pipe.set(f"currency:balance:{GUILD}:{user}", COINS)
+        pipe.zadd(f"currency:richest:{GUILD}", COINS, user)
+        pipe.hset(f"inventory:{GUILD}:{user}", item.uuid, ITEMS)
+    pipe.set(f"shop:prices:{GUILD}:{item.uuid}", PRICE)
+    await pipe.execute()
+
+
+async def cleanup(redis):
+    keys = [key async for key in redis.iscan(match=f"*:{GUILD}:*")]
+    keys.append(f"currency:richest:{GUILD}")
+    await redis.delete(*keys)
+
+
+async def operation(redis, users, item):
+    user, other = random.sample(users, 2)
+    wallet = Wallet(user, GUILD, redis)
+    inventory = Inventory(user, GUILD, redis)
+
+    kind = random.choice(("pay", "buy", "give", "settle"))
+    if kind == "pay":
+        await wallet.pay(Wallet(other, GUILD, redis), random.randint(1, 50))
+    elif kind == "buy":
+        await wallet.buy(item, random.randint(1, 3))
+    elif kind == "give":
+        await inventory.give(Inventory(other, GUILD, redis), item,
+                             random.randint(1, 5))
+    else:
+        stake = random.randint(1, 50)
+        await wallet.settle(stake, random.choice((0, 2 * stake)))
+
+
+async def worker(redis, users, item, operations, results):
+    for _ in range(operations):
+        try:
+            await operation(redis, users, item)
+            results["ok"] += 1
+        except commands.CommandError:
+            # Not enough coins or items: the scripts refused, as they should
+            results["refused"] += 1
+
+
+async def check(redis, users, item):
+    "Return a list of problems with the final state."
+    pipe = redis.pipeline()
+    for user in users:
+        pipe.get(f"currency:balance:{GUILD}:{user}")
+        pipe.hget(f"inventory:{GUILD}:{user}", item.uuid)
+    pipe.zrange(f"currency:richest:{GUILD}", 0, -1, withscores=True)
+    *values, richest = await pipe.execute()
+
+    balances = dict(zip(users, map(int, values[0::2])))
+    counts = dict(zip(users, map(int, values[1::2])))
+
+    problems = []
+    for user in users:
+        if balances[user] < 0:
+            problems.append(f"{user} has {balances[user]} coins")
+        if counts[user] < 0:
+            problems.append(f"{user} has {counts[user]} items")
+
+    if {user: int(score) for user, score in richest} != balances:
+        problems.append("The leaderboard doesn't match the balances")
+
+    return problems
+
+
+async def main(users=50, tasks=100, operations=100):
+    redis = await aioredis.create_redis_pool(
+        os.getenv("REDIS_URL") or "redis://localhost", encoding="utf-8")
+
+    users = [str(user) for user in range(users)]
+    item = Item("Widget", GUILD, uuid=f"{GUILD}-item")
+    results = {"ok": 0, "refused": 0}
+
+    try:
+        await setup(redis, users, item)
+
+        start = time.monotonic()
+        await asyncio.gather(*(
+            worker(redis, users, item, operations, results)
+            for _ in range(tasks)))
+        elapsed = time.monotonic() - start
+
+        problems = await check(redis, users, item)
+    finally:
+        await cleanup(redis)
+        redis.close()
+        await redis.wait_closed()
+
+    total = results["ok"] + results["refused"]
+    print(f"{total} operations ({results['refused']} refused) "
+          f"in {elapsed:.2f}s: {total / elapsed:.0f} ops/sec")
+
+    for problem in problems:
+        print(problem)
+    return not problems
+
+
+if __name__ == "__main__":
+    ok = asyncio.get_event_loop().run_until_complete(
+        main(*map(int, sys.argv[1:])))
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,102 @@
+# Benchmark for the member sync that GuildWatch runs on ready. Builds a
+# synthetic set of guilds and times the old approach (one SET and one HSET
+# awaited per member) against GuildWatch.sync_guild on an empty cache, on an
+# up to date cache, and after CHANGED of the members were renamed.
+#
+# Usage: python -m benchmarks.guild_sync [guilds] [members per guild]
+#
+# Everything is written under throwaway guild IDs in the Redis at REDIS_URL,
+# which are cleaned up afterwards.
+
+import asyncio
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+import aioredis
+
+from bot.internal.guild_watch import GuildWatch
+
+
+# First synthetic guild ID, far from any real snowflake
+GUILD_ID = 1000
+
+# Share of members renamed before the last sync
+CHANGED = 0.05
+
+
+def make_member(member_id):
+    return SimpleNamespace(
+        id=member_id, display_name=f"Member {member_id}",
+        avatar_url=f"https://cdn.example.com/avatars/{member_id}.png")
+
+
+def make_guilds(guilds, members):
+    return [SimpleNamespace(id=guild_id, name=f"Guild {guild_id}",
+                            members=[make_member(member_id)
+                                     for member_id in range(members)])
+            for guild_id in range(GUILD_ID, GUILD_ID + guilds)]
+
+
+async def sync_old(redis, guilds):
+    for guild in guilds:
+        for member in guild.members:
+            await redis.set(f"user:name:{guild.id}:{member.id}",
+                            member.display_name)
+            await redis.hset(f"profile:{guild.id}:{member.id}",
+                             "pfp", str(member.avatar_url))
+
+
+async def sync_new(cog, guilds):
+    for guild in guilds:
+        await cog.sync_guild(guild)
+
+
+async def cleanup(redis, guilds):
+    for guild in guilds:
+        keys = [f"guild:{guild.id}", f"guild:member:{guild.id}"]
+        for pattern in (f"user:name:{guild.id}:*", f"profile:{guild.id}:*"):
+            keys.extend([key async for key in redis.iscan(match=pattern)])
+        await redis.delete(*keys)
+
+
+async def timed(label, coro, members):
+    start = time.monotonic()
+    await coro
+    elapsed = time.monotonic() - start
+    print(f"{label:<24}{elapsed:>8.2f}s{members / elapsed:>12.0f} members/s")
+
+
+async def main(guilds=10, members=10000):
+    redis = await aioredis.create_redis_pool(
+        os.getenv("REDIS_URL") or "redis://localhost", encoding="utf-8")
+
+    guilds = make_guilds(guilds, members)
+    total = sum(len(guild.members) for guild in guilds)
+    cog = GuildWatch(SimpleNamespace(redis=redis))
+
+    print(f"{len(guilds)} guilds, {total} members")
+    try:
+        await timed("Sequential", sync_old(redis, guilds), total)
+        await cleanup(redis, guilds)
+
+        await timed("Pipelined, empty cache", sync_new(cog, guilds), total)
+        await timed("Pipelined, up to date", sync_new(cog, guilds), total)
+
+        for guild in guilds:
+            for member in random.sample(guild.members,
+                                        int(len(guild.members) * CHANGED)):
+                member.display_name += " (renamed)"
+        await timed(f"Pipelined, {CHANGED:.0%} changed",
+                    sync_new(cog, guilds), total)
+    finally:
+        await cleanup(redis, guilds)
+        redis.close()
+        await redis.wait_closed()
+
+
+if __name__ == "__main__":
+    asyncio.get_event_loop().run_until_complete(
+        main(*map(int, sys.argv[1:])))
@@ -0,0 +1,108 @@
+# Benchmark for the help embed cache. Builds a bot with synthetic cogs whose
+# commands carry checks, some of which wait LATENCY seconds like a Redis
+# round trip would, and times ;help with an empty cache against ;help once
+# the embed is cached.
+#
+# Usage: python -m benchmarks.help_cache [cogs] [commands per cog] [latency]
+#
+# No Redis or Discord connection is needed.
+
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+from discord.ext import commands
+
+from bot import base
+from bot.internal import help_command
+
+
+RUNS = 100
+
+
+class FakeFlags:
+    def __init__(self, latency):
+        self.latency = latency
+
+    async def is_nsfw(self, guild_id, channel_id):
+        await asyncio.sleep(self.latency)
+        return False
+
+
+class FakeChannel:
+    id = 1
+
+    def is_nsfw(self):
+        return False
+
+    async def send(self, *args, **kwargs):
+        pass
+
+
+def make_cog(index, count, latency):
+    "A cog with count commands, every other one with a Redis-backed check."
+
+    async def callback(self, ctx):
+        pass
+
+    async def slow_check(ctx):
+        await asyncio.sleep(latency)
+        return True
+
+    attrs = {"category": "Benchmark"}
+    for i in range(count):
+        command = commands.command(name=f"cog{index}cmd{i}")(callback)
+        if i % 2:
+            command = commands.check(slow_check)(command)
+        attrs[f"cmd{i}"] = command
+
+    return type(f"Cog{index}", (base.BaseCog,), attrs)
+
+
+async def run(help, mapping, runs, cold):
+    "Average seconds taken by ;help."
+    start = time.monotonic()
+    for _ in range(runs):
+        if cold:
+            help_command.cache.entries = {}
+        await help.send_bot_help(mapping)
+    return (time.monotonic() - start) / runs
+
+
+async def main(cogs=30, count=10, latency=0.001):
+    os.environ.setdefault("CONFIG_GUILD", "0")
+    os.environ.setdefault("CONFIG_CHANNEL", "0")
+
+    bot = commands.Bot(command_prefix=";", help_command=None)
+    bot.main_prefix = ";"
+    bot.redis = None
+    bot.flags = FakeFlags(latency)
+    for index in range(cogs):
+        bot.add_cog(make_cog(index, count, latency)(bot))
+
+    channel = FakeChannel()
+    permissions = SimpleNamespace(manage_messages=False, manage_guild=False,
+                                  manage_roles=False)
+    ctx = SimpleNamespace(
+        bot=bot, guild=SimpleNamespace(id=1), channel=channel,
+        author=SimpleNamespace(guild_permissions=permissions),
+        command=None, send=channel.send)
+
+    help = help_command.HelpCommand()
+    help.context = ctx
+    mapping = help.get_bot_mapping()
+
+    cold = await run(help, mapping, RUNS, cold=True)
+    warm = await run(help, mapping, RUNS, cold=False)
+
+    print(f"{cogs} cogs, {cogs * count} commands, "
+          f"{latency * 1000:g}ms per check round trip")
+    print(f"Cold ;help: {cold * 1000:.2f}ms")
+    print(f"Warm ;help: {warm * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.get_event_loop().run_until_complete(
+        main(*map(int, sys.argv[1:3]), *map(float, sys.argv[3:4])))
@@ -0,0 +1,83 @@
+# Benchmark for FuzzyMember's member search. Times scoring every display name
+# in a synthetic guild, as FuzzyMember used to, against MemberIndex.search,
+# at several guild sizes.
+#
+# Usage: python -m benchmarks.member_search [queries]
+#
+# No Redis or Discord connection is needed.
+
+import asyncio
+import random
+import string
+import sys
+import time
+from types import SimpleNamespace
+
+from fuzzywuzzy import process
+
+from bot.member_index import MemberIndex
+
+
+SIZES = (1000, 10000, 100000)
+
+
+class FakeGuild:
+    def __init__(self, guild_id, size):
+        self.id = guild_id
+        self.members = [SimpleNamespace(id=member_id, display_name=name(),
+                                        guild=self)
+                        for member_id in range(size)]
+        self.by_id = {member.id: member for member in self.members}
+
+    def get_member(self, member_id):
+        return self.by_id.get(member_id)
+
+
+def name():
+    return "".join(random.choice(string.ascii_lowercase)
+                   for _ in range(random.randint(4, 12)))
+
+
+def search_all(guild, text):
+    "The old search: score every display name in the guild."
+    names = {member.id: member.display_name for member in guild.members}
+    return process.extractOne(text, names)
+
+
+def query(guild):
+    "A slightly misspelled prefix of a random member's name."
+    text = random.choice(guild.members).display_name[:8]
+    i = random.randrange(len(text))
+    return text[:i] + random.choice(string.ascii_lowercase) + text[i+1:]
+
+
+async def main(queries=20):
+    index = MemberIndex()
+
+    print(f"{'members':>8}{'all names':>12}{'indexed':>12}{'first':>12}")
+    for guild_id, size in enumerate(SIZES):
+        guild = FakeGuild(guild_id, size)
+        texts = [query(guild) for _ in range(queries)]
+
+        start = time.monotonic()
+        for text in texts:
+            search_all(guild, text)
+        old = (time.monotonic() - start) / queries
+
+        # The first search also builds the index of the guild
+        start = time.monotonic()
+        await index.search(guild, texts[0])
+        first = time.monotonic() - start
+
+        start = time.monotonic()
+        for text in texts:
+            await index.search(guild, text)
+        new = (time.monotonic() - start) / queries
+
+        print(f"{size:>8}{old * 1000:>10.1f}ms{new * 1000:>10.1f}ms"
+              f"{first * 1000:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.get_event_loop().run_until_complete(
+        main(*map(int, sys.argv[1:])))
@@ -0,0 +1,124 @@
+# Load test for portal jobs. Connects an echo portal in this process to the
+# API at PORTAL_URL, fires JOBS concurrent jobs at it the way the Portal cog
+# does, and reports the response times along with the number of Redis
+# connections before and after, which should stay flat however many jobs
+# are waiting.
+#
+# Usage: python -m benchmarks.portal_load [jobs]
+#
+# Needs the API running, and the same PORTAL_ID_ECHO and PORTAL_TOKEN_ECHO
+# as portal/echo.py, which must not be running at the same time.
+
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+
+import aioredis
+
+from bot.connections.portal import Portal as PortalCog, Responses
+from bot.watch_stats import percentile
+from portal import Portal
+
+
+# Seconds to wait for the portal to connect
+CONNECT_TIMEOUT = 30
+
+
+async def start_portal(callback, **kwargs):
+    "Connect a portal answering with callback, returning it and its task."
+    portal = Portal(os.getenv("PORTAL_URL"), os.getenv("PORTAL_ID_ECHO"),
+                    os.getenv("PORTAL_TOKEN_ECHO"), **kwargs)
+    portal.on_request()(callback)
+    return portal, asyncio.create_task(portal.handle())
+
+
+async def wait_connected(redis, portal_id):
+    start = time.monotonic()
+    while await redis.hget(f"portal:{portal_id}", "status") != "2":
+        if time.monotonic() - start > CONNECT_TIMEOUT:
+            raise TimeoutError(f"Portal {portal_id} didn't connect")
+        await asyncio.sleep(0.1)
+
+
+async def send_job(redis, responses, portal_id, data):
+    "Send a job and wait for its response, returning the seconds taken."
+    job_id = str(uuid.uuid4())
+    response = responses.expect(portal_id, job_id)
+
+    query = {
+        "type": "query",
+        "job": job_id,
+        "portal": portal_id,
+        "data": data,
+        "time": time.time()
+    }
+
+    start = time.monotonic()
+    await redis.xadd(f"portal:{portal_id}:jobs",
+                     {"query": json.dumps(query)},
+                     max_len=PortalCog.MAX_JOBS)
+    try:
+        await asyncio.wait_for(response, PortalCog.TIMEOUT)
+    except asyncio.TimeoutError:
+        responses.forget(portal_id, job_id)
+        return None
+    return time.monotonic() - start
+
+
+async def send_jobs(redis, responses, portal_id, jobs):
+    """Send jobs concurrently, returning the seconds each one took (None if
+    it timed out) and the seconds taken overall."""
+    start = time.monotonic()
+    durations = await asyncio.gather(*(
+        send_job(redis, responses, portal_id, f"job {i}")
+        for i in range(jobs)))
+    return durations, time.monotonic() - start
+
+
+async def connections(redis):
+    return len((await redis.execute("CLIENT", "LIST")).splitlines())
+
+
+async def echo(data):
+    return {"title": data, "description": "Load test"}
+
+
+async def main(jobs=500):
+    redis = await aioredis.create_redis_pool(
+        os.getenv("REDIS_URL"), encoding="utf-8")
+    portal_id = os.getenv("PORTAL_ID_ECHO")
+
+    # Don't mistake a status left over from an earlier run for a connection
+    await redis.hset(f"portal:{portal_id}", "status", "0")
+    portal, task = await start_portal(echo, max_jobs=64)
+    try:
+        await wait_connected(redis, portal_id)
+
+        responses = Responses(redis)
+        await responses.start()
+
+        before = await connections(redis)
+        durations, elapsed = await send_jobs(
+            redis, responses, portal_id, jobs)
+        after = await connections(redis)
+    finally:
+        task.cancel()
+        await portal.disconnect()
+        redis.close()
+        await redis.wait_closed()
+
+    answered = [duration for duration in durations if duration is not None]
+    print(f"{len(answered)}/{jobs} jobs answered in {elapsed:.2f}s: "
+          f"{len(answered) / elapsed:.0f} jobs/sec")
+    if answered:
+        print(f"Response time p50 {percentile(answered, 50) * 1000:.0f}ms, "
+              f"p95 {percentile(answered, 95) * 1000:.0f}ms")
+    print(f"Redis connections: {before} before, {after} after")
+
+
+if __name__ == "__main__":
+    asyncio.get_event_loop().run_until_complete(
+        main(*map(int, sys.argv[1:])))
@@ -0,0 +1,85 @@
+# Throughput benchmark for the portal client. Runs an echo portal whose
+# callback blocks for DELAY seconds, like portal/echo.py, in a thread pool at
+# several max_jobs limits, and reports jobs per second along with the worst
+# event loop stall, which is how late pings would be answered.
+#
+# Usage: python -m benchmarks.portal_throughput [jobs] [delay]
+#
+# Needs the same setup as benchmarks.portal_load.
+
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aioredis
+
+from benchmarks.portal_load import send_jobs, start_portal, wait_connected
+from bot.connections.portal import Responses
+
+
+MAX_JOBS = (1, 4, 16)
+
+# Seconds between checks of the event loop
+TICK = 0.05
+
+
+async def measure_stall(stalls):
+    "Record the worst delay of a short sleep until cancelled."
+    while True:
+        start = time.monotonic()
+        await asyncio.sleep(TICK)
+        stalls.append(time.monotonic() - start - TICK)
+
+
+async def run(redis, responses, portal_id, jobs, delay, max_jobs):
+    def echo(data):
+        time.sleep(delay)
+        return {"title": data, "description": "Throughput benchmark"}
+
+    await redis.hset(f"portal:{portal_id}", "status", "0")
+    portal, task = await start_portal(
+        echo, executor=ThreadPoolExecutor(max_jobs), max_jobs=max_jobs)
+
+    stalls = []
+    try:
+        await wait_connected(redis, portal_id)
+
+        stall = asyncio.create_task(measure_stall(stalls))
+        durations, elapsed = await send_jobs(
+            redis, responses, portal_id, jobs)
+        stall.cancel()
+    finally:
+        task.cancel()
+        await portal.disconnect()
+        portal.executor.shutdown(wait=False)
+
+    answered = len([duration for duration in durations
+                    if duration is not None])
+    print(f"{max_jobs:>8}{answered:>6}/{jobs:<6}{answered / elapsed:>10.1f}"
+          f"{max(stalls, default=0) * 1000:>10.0f}ms")
+
+
+async def main(jobs=40, delay=1):
+    redis = await aioredis.create_redis_pool(
+        os.getenv("REDIS_URL"), encoding="utf-8")
+    portal_id = os.getenv("PORTAL_ID_ECHO")
+
+    print(f"{jobs} jobs taking {delay}s each")
+    print(f"{'max_jobs':>8}{'answered':>13}{'jobs/sec':>10}{'stall':>12}")
+    try:
+        responses = Responses(redis)
+        await responses.start()
+
+        for max_jobs in MAX_JOBS:
+            await run(redis, responses, portal_id, jobs, delay, max_jobs)
+    finally:
+        redis.close()
+        await redis.wait_closed()
+
+
+if __name__ == "__main__":
+    asyncio.get_event_loop().run_until_complete(
+        main(int(sys.argv[1]) if sys.argv[1:] else 40,
+             *map(float, sys.argv[2:3])))
@@ -0,0 +1,86 @@
+# Benchmark for Watch.poll. A fake Watchable sleeps for a random latency
+# around LATENCY seconds per target, and a few targets hang until they time
+# out, so the tick duration can be compared against the target count for
+# sequential polling and for a few concurrency limits.
+#
+# Usage: python -m benchmarks.watch_polling [latency] [timeout]
+#
+# No Redis or Discord connection is needed: only the polling stage of a tick
+# is run.
+
+import asyncio
+import random
+import sys
+import time
+
+from bot import watch
+
+
+TARGETS = (10, 100, 500)
+CONCURRENCY = (1, 8, 32)
+
+# Share of targets whose upstream never answers
+HANGING = 0.02
+
+
+class FakeBot:
+    redis = None
+    polls_watches = False
+
+    def listen(self):
+        return lambda func: func
+
+
+class FakeWatchable(watch.Watchable):
+    qualified_name = "Benchmark"
+
+    def __init__(self, latency):
+        self.bot = FakeBot()
+        self.latency = latency
+        self.hanging = set()
+
+    async def get_state(self, target):
+        if target in self.hanging:
+            await asyncio.Event().wait()
+        await asyncio.sleep(random.uniform(0.5, 1.5) * self.latency)
+        return target
+
+
+class BenchmarkWatch(watch.Watch):
+    def start_listeners(self):
+        pass
+
+
+async def tick(cog, targets, concurrency, timeout):
+    "Poll every target once, returning the seconds taken."
+    bench = BenchmarkWatch(cog, concurrency=concurrency, timeout=timeout)
+
+    async def update(target, state, new_hash):
+        pass
+
+    start = time.monotonic()
+    await bench.poll(targets, update)
+    return time.monotonic() - start
+
+
+async def main(latency=0.2, timeout=5):
+    cog = FakeWatchable(latency)
+
+    print(f"Latency {latency}s, timeout {timeout}s, "
+          f"{HANGING:.0%} of targets hanging")
+    print("targets  " + "".join(f"{f'c={limit}':>10}"
+                                for limit in CONCURRENCY))
+
+    for count in TARGETS:
+        targets = [f"target{i}" for i in range(count)]
+        cog.hanging = set(random.sample(targets, int(count * HANGING)))
+
+        durations = [await tick(cog, targets, limit, timeout)
+                     for limit in CONCURRENCY]
+        print(f"{count:>7}  " + "".join(f"{duration:>9.1f}s"
+                                        for duration in durations))
+
+
+if __name__ == "__main__":
+    asyncio.get_event_loop().run_until_complete(
+        main(*map(float, sys.argv[1:])))
@@ -0,0 +1,117 @@
+# Memory benchmark for the MessageWatch registry. Registers messages in the
+# old layout (a messages set, a set per guild and two string keys per
+# message), migrates them to the registry hash, and compares the Redis memory
+# used by each layout.
+#
+# Usage: python -m benchmarks.watch_registry [messages] [guilds] [targets]
+#
+# Everything is written under a throwaway watch name in the Redis at
+# REDIS_URL, which is cleaned up afterwards.
+
+import asyncio
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+import aioredis
+
+from bot import watch
+
+
+NAME = "RegistryBenchmark"
+
+
+class FakeBot:
+    polls_watches = False
+
+    def __init__(self, redis, channels):
+        self.redis = redis
+        self.channels = channels
+
+    def listen(self):
+        return lambda func: func
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+
+class BenchmarkWatch(watch.MessageWatch):
+    def start_listeners(self):
+        pass
+
+
+async def used_memory(redis):
+    info = await redis.info("memory")
+    return int(info["memory"]["used_memory"])
+
+
+async def register_old(redis, messages, channels, targets):
+    "Register messages the way MessageWatch used to."
+    pipe = redis.pipeline()
+    for message_id in range(messages):
+        channel = random.choice(list(channels.values()))
+        target = random.choice(targets)
+
+        pipe.sadd(f"watch:{NAME}:targets", target)
+        pipe.sadd(f"watch:{NAME}:target:{target}", message_id)
+        pipe.sadd(f"watch:{NAME}:messages", message_id)
+        pipe.sadd(f"watch:{NAME}:guild:{channel.guild.id}:messages",
+                  message_id)
+        pipe.set(f"watch:{NAME}:message:{message_id}:channel", channel.id)
+        pipe.set(f"watch:{NAME}:message:{message_id}:target", target)
+    await pipe.execute()
+
+
+async def cleanup(redis):
+    keys = [key async for key in redis.iscan(match=f"watch:{NAME}:*")]
+    if keys:
+        await redis.delete(*keys)
+    await redis.srem("watch:registry:indexed", NAME)
+
+
+async def main(messages=10000, guilds=100, targets=500):
+    redis = await aioredis.create_redis_pool(
+        os.getenv("REDIS_URL") or "redis://localhost", encoding="utf-8")
+
+    channels = {}
+    for guild_id in range(1, guilds + 1):
+        guild = SimpleNamespace(id=guild_id)
+        for channel_id in range(guild_id * 100, guild_id * 100 + 5):
+            channels[channel_id] = SimpleNamespace(id=channel_id, guild=guild)
+    targets = [f"target{i}" for i in range(targets)]
+
+    cog = SimpleNamespace(qualified_name=NAME,
+                          bot=FakeBot(redis, channels))
+
+    try:
+        await cleanup(redis)
+        baseline, keys = await used_memory(redis), await redis.dbsize()
+
+        await register_old(redis, messages, channels, targets)
+        old = await used_memory(redis) - baseline
+        old_keys = await redis.dbsize() - keys
+
+        start = time.monotonic()
+        await BenchmarkWatch(cog).migrate()
+        elapsed = time.monotonic() - start
+
+        new = await used_memory(redis) - baseline
+        new_keys = await redis.dbsize() - keys
+    finally:
+        await cleanup(redis)
+        redis.close()
+        await redis.wait_closed()
+
+    print(f"{messages} messages in {guilds} guilds, {len(targets)} targets")
+    print(f"Old layout: {old_keys} keys, {old / 1024:.0f} KiB, "
+          f"{old / messages:.0f} bytes per message")
+    print(f"Registry:   {new_keys} keys, {new / 1024:.0f} KiB, "
+          f"{new / messages:.0f} bytes per message")
+    print(f"Migrated in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.get_event_loop().run_until_complete(
+        main(*map(int, sys.argv[1:])))
@@ -5,6 +5,11 @@ import aioredis
 import discord
 from discord.ext import commands
 
+from bot import delivery
+from bot import flags
+from bot import member_index
+from bot import watch
+
 prefix = os.getenv("BOT_PREFIX") or ";"
 
 intents = discord.Intents.default()
@@ -17,57 +22,80 @@ breqbot = commands.Bot(
 )
 breqbot.main_prefix = prefix
 
+# "gateway" processes answer commands and events but don't poll watches,
+# "poller" processes only poll watches and deliver their updates, and by
+# default a process does both
+mode = os.getenv("BOT_MODE") or "all"
+breqbot.polls_watches = mode in ("all", "poller")
+
 loop = asyncio.get_event_loop()
 breqbot.redis = loop.run_until_complete(aioredis.create_redis_pool(
     os.getenv("REDIS_URL"), encoding="utf-8"))
 
 breqbot.watches = {}
+breqbot.delivery = delivery.DeliveryQueue(breqbot)
+breqbot.flags = flags.Flags(breqbot)
+breqbot.member_index = member_index.MemberIndex()
+breqbot.membership = watch.Membership(breqbot)
+
+
+def load(extension, poller=False):
+    "Load an extension, unless this process only polls and it isn't needed."
+    if mode != "poller" or poller:
+        breqbot.load_extension(extension)
+
+
+if mode == "poller":
+    @breqbot.event
+    async def on_message(message):
+        pass
+
 
 # About
-breqbot.load_extension("bot.about.about")
-breqbot.load_extension("bot.about.fun")
-breqbot.load_extension("bot.about.config")
-breqbot.load_extension("bot.about.debug")
-breqbot.load_extension("bot.about.global_config")
+load("bot.about.about")
+load("bot.about.fun")
+load("bot.about.config")
+load("bot.about.debug")
+load("bot.about.global_config")
 
 # Profile
-breqbot.load_extension("bot.profile.card")
-# breqbot.load_extension("bot.profile.birthdays")
-# breqbot.load_extension("bot.profile.pronouns")
-breqbot.load_extension("bot.profile.outfit")
+load("bot.profile.card")
+# load("bot.profile.birthdays")
+# load("bot.profile.pronouns")
+load("bot.profile.outfit")
 
 # Economy
-breqbot.load_extension("bot.economy.currency")
-breqbot.load_extension("bot.economy.items")
-breqbot.load_extension("bot.economy.shop")
+load("bot.economy.currency")
+load("bot.economy.items")
+load("bot.economy.shop")
 
 # Games
-breqbot.load_extension("bot.games.games")
+load("bot.games.games")
 
 # Feeds
-breqbot.load_extension("bot.feeds.reddit")
-breqbot.load_extension("bot.feeds.comics")
-breqbot.load_extension("bot.feeds.minecraft")
-breqbot.load_extension("bot.feeds.youtube")
-breqbot.load_extension("bot.feeds.twitter")
-breqbot.load_extension("bot.feeds.stocks")
-breqbot.load_extension("bot.feeds.forex")
-# breqbot.load_extension("bot.feeds.status")
-breqbot.load_extension("bot.feeds.watching")
+load("bot.feeds.reddit", poller=True)
+load("bot.feeds.comics", poller=True)
+load("bot.feeds.minecraft", poller=True)
+load("bot.feeds.youtube", poller=True)
+load("bot.feeds.twitter", poller=True)
+load("bot.feeds.stocks", poller=True)
+load("bot.feeds.forex", poller=True)
+# load("bot.feeds.status", poller=True)
+load("bot.feeds.watching")
 
 # Tools
-breqbot.load_extension("bot.tools.rolemenu")
-breqbot.load_extension("bot.tools.emojiboard")
-breqbot.load_extension("bot.tools.soundboard")
+load("bot.tools.rolemenu")
+load("bot.tools.emojiboard")
+load("bot.tools.soundboard")
 
 # Connections
-# breqbot.load_extension("bot.connections.friendly_bots")
-breqbot.load_extension("bot.connections.portal")
+# load("bot.connections.friendly_bots")
+load("bot.connections.portal")
 
 # Internal
-breqbot.load_extension("bot.internal.help_command")
-breqbot.load_extension("bot.internal.error_handler")
-breqbot.load_extension("bot.internal.guild_watch")
+load("bot.internal.help_command")
+load("bot.internal.error_handler")
+load("bot.internal.guild_watch")
 
 
 breqbot.run(os.getenv("DISCORD_TOKEN"))
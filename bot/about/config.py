@@ -18,6 +18,7 @@ class Config(base.BaseCog):
         elif feature == "nsfw":
             await self.redis.set(
                 f"channel:{ctx.guild.id}:{ctx.channel.id}:nsfw", "1")
+            await self.bot.flags.invalidate()
         else:
             raise commands.CommandError(f"Unsupported feature: {feature}")
 
@@ -33,6 +34,7 @@ class Config(base.BaseCog):
         elif feature == "nsfw":
             await self.redis.set(
                 f"channel:{ctx.guild.id}:{ctx.channel.id}:nsfw", "0")
+            await self.bot.flags.invalidate()
         else:
             raise commands.CommandError(f"Unsupported feature: {feature}")
 
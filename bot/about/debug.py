@@ -64,6 +64,10 @@ class Debug(base.BaseCog):
         commands = await self.redis.get("commands:total_run")
         fields.append(f"**{commands}** commands run")
 
+        http_stats = await self.redis.hgetall("httpcache:stats")
+        fields.append(f"HTTP cache: **{http_stats.get('hits', 0)}** hits, "
+                      f"**{http_stats.get('misses', 0)}** misses")
+
         embed.description = "\n".join(fields)
 
         await ctx.send(embed=embed)
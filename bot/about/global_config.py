@@ -122,12 +122,14 @@ class GlobalConfig(base.BaseCog):
     async def ban(self, ctx, user_id: int):
         "Ban a user from using Breqbot"
         await self.redis.sadd("user:banned:list", user_id)
+        await self.bot.flags.invalidate()
         await ctx.message.add_reaction("✅")
 
     @commands.command()
     async def unban(self, ctx, user_id: int):
         "Revert a user ban"
         await self.redis.srem("user:banned:list", user_id)
+        await self.bot.flags.invalidate()
         await ctx.message.add_reaction("✅")
 
     @commands.command()
@@ -170,5 +172,4 @@ def setup(bot):
 
     @bot.check
     async def check_banned(ctx):
-        return not int(
-            await bot.redis.sismember("user:banned:list", ctx.author.id))
+        return not await bot.flags.is_banned(ctx.author.id)
@@ -1,12 +1,12 @@
 import os
 import re
+import asyncio
 import dataclasses
 import typing
 import inspect
 
 import discord
 from discord.ext import commands
-from fuzzywuzzy import process
 
 
 class BaseCog(commands.Cog):
@@ -35,14 +35,10 @@ class FuzzyMember(commands.Converter):
                 return member
 
         # Otherwise try to match based on string content
-        member_names = {}
-        for member in ctx.guild.members:
-            member_names[member.display_name] = member
-
-        match, score = process.extractOne(text, member_names.keys())
+        member, score = await ctx.bot.member_index.search(ctx.guild, text)
 
         if score > 80:
-            return member_names[match]
+            return member
 
 
 @dataclasses.dataclass
@@ -52,8 +48,29 @@ class Response:
     files: dict = None
     embed: discord.Embed = None
 
+    # The same Response may be sent to several channels at once, and each
+    # send has to read the files from the start
+    lock: asyncio.Lock = dataclasses.field(
+        default_factory=asyncio.Lock, init=False, repr=False, compare=False)
+
+    # CDN URLs of the files once they have been uploaded, so that later
+    # destinations can link to them instead of uploading them again
+    attachment_urls: list = dataclasses.field(
+        default=None, init=False, repr=False, compare=False)
+
     async def send_to(self, dest: typing.Union[discord.abc.Messageable,
-                                               discord.Message]):
+                                               discord.Message,
+                                               discord.PartialMessage]):
+        if self.files and not self.attachment_urls:
+            async with self.lock:
+                return await self._send_to(dest)
+        return await self._send_to(dest)
+
+    async def _send_to(self, dest):
+        editing = isinstance(dest, (discord.Message, discord.PartialMessage))
+
+        if self.attachment_urls and not editing:
+            return await self._send_links(dest)
 
         if self.files:
             for file in self.files.values():
@@ -66,7 +83,7 @@ class Response:
             files = []
             file_groups = []
 
-        if isinstance(dest, discord.Message):
+        if editing:
             await dest.edit(
                 content=self.content, files=files, embed=self.embed)
             return dest
@@ -74,23 +91,51 @@ class Response:
         if len(file_groups) == 0:
             return await dest.send(content=self.content, embed=self.embed)
         elif len(file_groups) == 1:
-            return await dest.send(
-                content=self.content, embed=self.embed, files=file_groups[0])
+            messages = [await dest.send(
+                content=self.content, embed=self.embed, files=file_groups[0])]
         else:
             # Send the first message with the content
-            await dest.send(content=self.content, files=file_groups[0])
+            messages = [
+                await dest.send(content=self.content, files=file_groups[0])]
             # Send the middle messages with just files
             for group in file_groups[1:-1]:
-                await dest.send(files=group)
+                messages.append(await dest.send(files=group))
             # Send the final message with the embed
-            return await dest.send(embed=self.embed, files=file_groups[-1])
+            messages.append(
+                await dest.send(embed=self.embed, files=file_groups[-1]))
+
+        self.attachment_urls = [attachment.url for message in messages
+                                for attachment in message.attachments]
+        return messages[-1]
+
+    async def _send_links(self, dest):
+        "Send the already uploaded files as links to their CDN URLs."
+
+        if (len(self.attachment_urls) == 1 and self.embed
+                and not self.embed.image):
+            embed = discord.Embed.from_dict(self.embed.to_dict())
+            embed.set_image(url=self.attachment_urls[0])
+            return await dest.send(content=self.content, embed=embed)
+
+        # Discord only unfurls the first few links in a message
+        url_groups = [self.attachment_urls[i:i+5]
+                      for i in range(0, len(self.attachment_urls), 5)]
+
+        content = "\n".join(filter(None, [self.content, *url_groups[0]]))
+        if len(url_groups) == 1:
+            return await dest.send(content=content, embed=self.embed)
+
+        await dest.send(content=content)
+        for group in url_groups[1:-1]:
+            await dest.send(content="\n".join(group))
+        return await dest.send(
+            content="\n".join(url_groups[-1]), embed=self.embed)
 
 
 async def ctx_is_nsfw(ctx):
     if ctx.channel.is_nsfw():
         return True
-    if int(await ctx.bot.redis.get(
-            f"channel:{ctx.guild.id}:{ctx.channel.id}:nsfw") or "0"):
+    if await ctx.bot.flags.is_nsfw(ctx.guild.id, ctx.channel.id):
         return True
     return False
 
@@ -1,8 +1,10 @@
 import uuid
 import time
+import itertools
 import asyncio
-import os
 import json
+import os
+import traceback
 
 import aioredis
 import discord
@@ -12,11 +14,98 @@ from bot import base
 from bot.economy import itemlib
 
 
+class Responses:
+    """Routes portal responses to the jobs waiting for them.
+
+    Responses from every portal are appended to the portal:replies stream
+    by the API, and one reader follows it for all jobs, rather than a
+    connection per job."""
+
+    # Milliseconds to block for on each read of the stream
+    BLOCK = 5000
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.jobs = {}
+
+        self.last_id = None
+        self.task = None
+        self.lock = asyncio.Lock()
+
+    async def start(self):
+        async with self.lock:
+            if self.task and not self.task.done():
+                return
+
+            # Follow the stream from where it is now, so that replies to
+            # jobs sent right after this are not missed
+            if self.last_id is None:
+                last = await self.redis.xrevrange("portal:replies", count=1)
+                self.last_id = last[0][0] if last else "0-0"
+
+            self.task = asyncio.create_task(self.route())
+
+    async def route(self):
+        # Blocking reads would tie up a connection of the shared pool
+        conn = None
+
+        while True:
+            try:
+                if conn is None or conn.closed:
+                    conn = await aioredis.create_redis(
+                        os.getenv("REDIS_URL"), encoding="utf-8")
+                entries = await conn.xread(
+                    ["portal:replies"], timeout=self.BLOCK,
+                    latest_ids=[self.last_id])
+            except (aioredis.RedisError, OSError):
+                traceback.print_exc()
+                if conn is not None:
+                    conn.close()
+                    conn = None
+                await asyncio.sleep(1)
+                continue
+
+            for _, entry_id, fields in entries:
+                self.last_id = entry_id
+
+                message = json.loads(fields["response"])
+                future = self.jobs.pop(
+                    (message["portal"], message["job"]), None)
+                if future and not future.done():
+                    future.set_result(message)
+
+    def expect(self, portal_id, job_id):
+        "Return a future for the response to a job, before it is sent."
+        future = asyncio.get_event_loop().create_future()
+        self.jobs[(portal_id, job_id)] = future
+        return future
+
+    def forget(self, portal_id, job_id):
+        self.jobs.pop((portal_id, job_id), None)
+
+
 class Portal(base.BaseCog):
     "Interface with real-world things"
 
     category = "Connections"
 
+    # Seconds to wait for a portal to respond
+    TIMEOUT = 120
+
+    # Approximate number of jobs to keep in each portal's stream
+    MAX_JOBS = 1000
+
+    # Seconds between clock updates while waiting, or None to not show them
+    PROGRESS_INTERVAL = 5
+
+    def __init__(self, bot):
+        super().__init__(bot)
+        self.responses = Responses(self.redis)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        await self.responses.start()
+
     async def get_portal(self, id, user_id=None):
         portal = await self.redis.hgetall(f"portal:{id}")
         if not portal:
@@ -84,19 +173,17 @@ class Portal(base.BaseCog):
         else:
             message = None
 
-        sub_conn = await aioredis.create_redis(
-            os.getenv("REDIS_URL"), encoding="utf-8")
-        channel = (await sub_conn.subscribe(f"portal:{portal_id}:{job_id}"))[0]
+        await self.responses.start()
+        response_task = self.responses.expect(portal_id, job_id)
 
         query = {
             "type": "query",
             "job": job_id,
             "portal": portal_id,
-            "data": command
+            "data": command,
+            "time": time.time()
         }
 
-        clocks = "🕐🕑🕒🕓🕔🕕🕖🕗🕘🕙🕚🕛"
-
         embed = discord.Embed(title="Waiting for response...")
 
         if message:
@@ -104,42 +191,30 @@ class Portal(base.BaseCog):
         else:
             message = await ctx.send(embed=embed)
 
-        await self.redis.publish_json(
-            f"portal:{portal_id}:{job_id}", query)
-
-        async def get_response():
-            async for message in channel.iter(decoder=json.loads):
-                if message["type"] == "response":
-                    return message
-
-        ts = time.time()
-        frame = 0
-
-        response_task = asyncio.create_task(get_response())
+        await self.redis.xadd(f"portal:{portal_id}:jobs",
+                              {"query": json.dumps(query)},
+                              max_len=self.MAX_JOBS)
+
+        if self.PROGRESS_INTERVAL:
+            progress = asyncio.create_task(
+                self.show_progress(message, embed))
+
+        try:
+            response = await asyncio.wait_for(response_task, self.TIMEOUT)
+        except asyncio.TimeoutError:
+            response = None
+        finally:
+            if self.PROGRESS_INTERVAL:
+                progress.cancel()
+
+        if response is None:
+            self.responses.forget(portal_id, job_id)
+            embed.title = "Timed Out"
+            embed.description = (f"Portal {portal_name} "
+                                 "did not respond in time.")
+            await message.edit(embed=embed)
+            return
 
-        while True:
-            if time.time() - ts > 120:
-                # Connection timed out
-                embed.title = "Timed Out"
-                embed.description = (f"Portal {portal_name} "
-                                     "did not respond in time.")
-                await message.edit(embed=embed)
-                return
-
-            if frame % 5 == 0:
-                clock_index = (frame // 5) % len(clocks)
-                clock = clocks[clock_index]
-                embed.description = clock
-                await message.edit(embed=embed)
-
-            if response_task.done():
-                break
-
-            frame += 1
-
-            await asyncio.sleep(0.2)
-
-        response = response_task.result()
         data = response["data"]
 
         embed = discord.Embed()
@@ -154,6 +229,18 @@ class Portal(base.BaseCog):
 
         await message.edit(embed=embed)
 
+    async def show_progress(self, message, embed):
+        clocks = "🕐🕑🕒🕓🕔🕕🕖🕗🕘🕙🕚🕛"
+
+        for frame in itertools.count():
+            embed.description = clocks[frame % len(clocks)]
+            try:
+                await message.edit(embed=embed)
+            except discord.HTTPException:
+                pass
+
+            await asyncio.sleep(self.PROGRESS_INTERVAL)
+
     @portal.command()
     async def create(self, ctx):
         "Register a new Portal"
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import time
+import traceback
+
+import aiohttp
+import discord
+
+
+class DeliveryQueue:
+    """Sends watch notifications to their channels from a pool of worker
+    tasks, so that polling only has to detect changes and enqueue them.
+
+    Failed sends are retried with exponential backoff. Deliveries that run
+    out of retries, or go to channels that are gone, are recorded in
+    watch:<name>:dead_letters, and the channel is unregistered only if it is
+    gone. Missing permissions are often fixed later, so they are retried
+    like any other failure."""
+
+    RETRIES = 3
+    BACKOFF = 2
+    DEAD_LETTERS = 100
+
+    def __init__(self, bot, workers=4):
+        self.bot = bot
+        self.workers = workers
+
+        self.queue = asyncio.Queue()
+        self.tasks = []
+
+        @self.bot.listen()
+        async def on_ready():
+            self.start()
+
+    def start(self):
+        # on_ready is dispatched again after reconnects
+        if self.tasks:
+            return
+
+        self.tasks = [asyncio.create_task(self.worker())
+                      for _ in range(self.workers)]
+
+    def put(self, watch, target, channel_id, response, attempt=0):
+        self.queue.put_nowait((watch, target, channel_id, response, attempt))
+
+    async def worker(self):
+        while True:
+            delivery = await self.queue.get()
+            try:
+                await self.deliver(*delivery)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                self.queue.task_done()
+
+    async def deliver(self, watch, target, channel_id, response, attempt):
+        channel = self.bot.get_channel(int(channel_id))
+
+        if not channel:
+            await self.dead_letter(watch, target, channel_id, "Not found")
+            await watch.unregister(discord.Object(int(channel_id)), target)
+            return
+
+        try:
+            with watch.timed("send"):
+                await response.send_to(channel)
+        except discord.NotFound as e:
+            await self.dead_letter(watch, target, channel_id, str(e))
+            await watch.unregister(channel, target)
+        except (discord.HTTPException, aiohttp.ClientError,
+                asyncio.TimeoutError) as e:
+            if attempt < self.RETRIES:
+                asyncio.get_event_loop().call_later(
+                    self.BACKOFF ** attempt, self.put,
+                    watch, target, channel_id, response, attempt + 1)
+            else:
+                await self.dead_letter(watch, target, channel_id, str(e))
+
+    async def dead_letter(self, watch, target, channel_id, error):
+        key = f"watch:{watch.name}:dead_letters"
+
+        pipe = watch.redis.pipeline()
+        pipe.lpush(key, json.dumps({
+            "target": target,
+            "channel": str(channel_id),
+            "error": error,
+            "time": time.time()
+        }))
+        pipe.ltrim(key, 0, self.DEAD_LETTERS - 1)
+        await pipe.execute()
@@ -30,6 +30,20 @@ class Currency(base.BaseCog):
         with open("bot/economy/quests.json") as f:
             self.QUEST_MESSAGES = json.load(f)
 
+    @commands.Cog.listener()
+    async def on_ready(self):
+        for guild in self.bot.guilds:
+            await itemlib.Wallet.backfill(self.redis, guild)
+            await itemlib.Wallet.prune(self.redis, guild)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        await itemlib.Wallet(member, member.guild, self.redis).show()
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        await itemlib.Wallet(member, member.guild, self.redis).hide()
+
     @commands.command()
     @commands.guild_only()
     async def balance(self, ctx, user: typing.Optional[base.FuzzyMember]):
@@ -39,31 +53,39 @@ class Currency(base.BaseCog):
 
         async with itemlib.Wallet(user, ctx.guild, self.redis) as wallet:
             coins = await wallet.get_balance()
+            rank = await wallet.get_rank()
 
-        await ctx.send(f"{user.display_name} has **{coins}** Breqcoins.")
+        if rank:
+            await ctx.send(f"{user.display_name} has **{coins}** Breqcoins. "
+                           f"(#{rank} on {ctx.guild.name})")
+        else:
+            await ctx.send(f"{user.display_name} has **{coins}** Breqcoins.")
 
     @commands.command()
     @commands.guild_only()
     async def richest(self, ctx):
         "Display the richest members on the server :moneybag:"
-        richest = []
-
-        for member_id in \
-                await self.redis.smembers(f"guild:member:{ctx.guild.id}"):
 
-            async with itemlib.Wallet(member_id, ctx.guild, self.redis) \
-                    as wallet:
-                coins = await wallet.get_balance()
-
-            richest.append((ctx.guild.get_member(int(member_id)), coins))
+        # Skip anyone who left without the leaderboard hearing about it
+        richest = []
+        start = 0
+        while len(richest) < 5:
+            page = await itemlib.Wallet.richest(
+                self.redis, ctx.guild, start, 10)
+            if not page:
+                break
+            start += len(page)
 
-        richest = sorted(richest, key=lambda item: item[1], reverse=True)[:5]
+            richest.extend((ctx.guild.get_member(member_id), coins)
+                           for member_id, coins in page
+                           if ctx.guild.get_member(member_id))
+        richest = richest[:5]
 
         embed = discord.Embed(title=f"Richest members on {ctx.guild.name}")
 
         embed.description = "\n".join(
             f"{member.display_name}: {balance}"
-            for member, balance in richest if member)
+            for member, balance in richest)
 
         await ctx.send(embed=embed)
 
@@ -73,10 +95,8 @@ class Currency(base.BaseCog):
         "Give coins to another user :incoming_envelope:"
 
         async with itemlib.Wallet(ctx.author, ctx.guild, self.redis) as wallet:
-            await wallet.remove(amount)
-
-        async with itemlib.Wallet(user, ctx.guild, self.redis) as wallet:
-            await wallet.add(amount)
+            await wallet.pay(
+                itemlib.Wallet(user, ctx.guild, self.redis), amount)
 
         await ctx.message.add_reaction("✅")
 
@@ -154,7 +174,7 @@ class Currency(base.BaseCog):
                 async with itemlib.Wallet(user, ctx.guild, self.redis) \
                         as wallet:
                     try:
-                        await wallet.ensure(wager)
+                        await wallet.settle(wager, payout)
                     except commands.CommandError:
                         try:
                             await reaction.remove(user)
@@ -163,12 +183,10 @@ class Currency(base.BaseCog):
                     else:
                         net_winnings = payout - wager
                         if net_winnings >= 0:
-                            await wallet.add(net_winnings)
                             results.append(
                                 f"• {user.display_name} won "
                                 f"{net_winnings} coins")
                         else:
-                            await wallet.remove(-net_winnings)
                             results.append(
                                 f"• {user.display_name} lost "
                                 f"{-net_winnings} coins")
@@ -1,8 +1,89 @@
+import asyncio
+import collections
+import copy
+import traceback
 from uuid import uuid4
 
 import discord
 from discord.ext import commands
 
+from . import scripts
+
+
+class ItemCache:
+    """LRU cache of items loaded from Redis.
+
+    Whenever an item is saved, renamed or deleted it is evicted here and an
+    invalidation is published on items:invalidate, so that every other
+    process listening evicts it too. Nothing is cached while this process
+    isn't subscribed, since invalidations would be missed.
+
+    Every eviction bumps version, and an item is only cached if no eviction
+    happened since it started loading, so a load can't put back an item
+    that was invalidated meanwhile."""
+
+    SIZE = 1024
+
+    def __init__(self):
+        self.items = collections.OrderedDict()
+        self.version = 0
+
+        self.listening = False
+        self.subscribed = False
+
+    def get(self, uuid):
+        item = self.items.get(uuid)
+        if item is None:
+            return None
+
+        self.items.move_to_end(uuid)
+        # Callers are free to modify the item they get back
+        return copy.copy(item)
+
+    def put(self, item, version):
+        if not self.subscribed or version != self.version:
+            return
+
+        self.items[item.uuid] = copy.copy(item)
+        self.items.move_to_end(item.uuid)
+
+        while len(self.items) > self.SIZE:
+            self.items.popitem(last=False)
+
+    def evict(self, uuid):
+        self.version += 1
+        self.items.pop(uuid, None)
+
+    def clear(self):
+        self.version += 1
+        self.items.clear()
+
+    async def invalidate(self, redis, uuid):
+        self.evict(uuid)
+        await redis.publish("items:invalidate", uuid)
+
+    async def listen(self, redis):
+        if self.listening:
+            return
+        self.listening = True
+
+        while True:
+            try:
+                channel, = await redis.subscribe("items:invalidate")
+                self.subscribed = True
+                async for uuid in channel.iter(encoding="utf-8"):
+                    self.evict(uuid)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                self.subscribed = False
+                self.clear()
+
+            await asyncio.sleep(1)
+
+
+cache = ItemCache()
+
 
 class Item():
     def __init__(self, name=None, guild_id=None, owner_id=None,
@@ -31,24 +112,57 @@ class Item():
         return item
 
     @staticmethod
-    async def from_redis(redis, uuid):
-        exists = await redis.sismember("items:list", uuid)
-        if not exists:
-            item = MissingItem(uuid)
-            await item.cleanup(redis)
-            return item
-
-        item = Item()
-        item.uuid = uuid
-
-        item.name = await redis.hget(item.redis_key, "name")
-        item.guild = int(await redis.hget(item.redis_key, "guild") or "0")
-        item.owner = int(await redis.hget(item.redis_key, "owner") or "0")
-        item.desc = await redis.hget(item.redis_key, "desc")
-        item.wearable = bool(
-            await redis.hget(item.redis_key, "wearable") or "0")
+    def from_fields(uuid, fields):
+        item = Item(uuid=uuid)
+
+        item.name = fields.get("name")
+        item.guild = int(fields.get("guild") or "0")
+        item.owner = int(fields.get("owner") or "0")
+        item.desc = fields.get("desc")
+        item.wearable = bool(int(fields.get("wearable") or "0"))
         return item
 
+    @staticmethod
+    async def from_redis(redis, uuid):
+        return (await Item.many_from_redis(redis, [uuid]))[0]
+
+    @staticmethod
+    async def many_from_redis(redis, uuids):
+        """Load a list of items, in the same order as uuids. Items not in the
+        cache are fetched together in one pipeline."""
+
+        uuids = list(uuids)
+        items = {}
+
+        for uuid in uuids:
+            item = cache.get(uuid)
+            if item:
+                items[uuid] = item
+
+        misses = [uuid for uuid in dict.fromkeys(uuids) if uuid not in items]
+        if misses:
+            version = cache.version
+            pipe = redis.pipeline()
+            for uuid in misses:
+                pipe.sismember("items:list", uuid)
+                pipe.hgetall(f"items:{uuid}")
+            results = await pipe.execute()
+
+            missing = []
+            for uuid, exists, fields in zip(
+                    misses, results[::2], results[1::2]):
+                if exists:
+                    items[uuid] = Item.from_fields(uuid, fields)
+                    cache.put(items[uuid], version)
+                else:
+                    items[uuid] = MissingItem(uuid)
+                    missing.append(uuid)
+
+            if missing:
+                await redis.delete(*(f"items:{uuid}" for uuid in missing))
+
+        return [items[uuid] for uuid in uuids]
+
     @staticmethod
     async def from_name(redis, guild_id, name):
         name = name.strip('" ')
@@ -94,6 +208,8 @@ class Item():
         await redis.set(
             f"items:from_name:{self.guild}:{self.name.lower()}", self.uuid)
 
+        await cache.invalidate(redis, self.uuid)
+
     async def rename(self, redis, newname):
         if not await self.check_name(redis, self.guild, newname):
             raise commands.Commanderror("Item name in use")
@@ -104,6 +220,8 @@ class Item():
         await redis.set(
             f"items:from_name:{self.guild}:{self.name.lower()}", self.uuid)
 
+        await cache.invalidate(redis, self.uuid)
+
     async def delete(self, redis):
         await redis.srem("items:list", self.uuid)
         await redis.srem(f"items:list:{self.guild}", self.uuid)
@@ -112,6 +230,8 @@ class Item():
         await redis.delete(f"items:from_name:{self.guild}:{self.name.lower()}")
         await redis.delete(self.redis_key)
 
+        await cache.invalidate(redis, self.uuid)
+
     def is_owner(self, user):
         return (user.id == self.owner)
 
@@ -176,15 +296,52 @@ class Inventory:
     async def remove(self, item, qty=1):
         if qty < 0:
             raise commands.CommandError("Negative numbers are not allowed.")
-        await self.ensure(item, qty)
-        await self.redis.hincrby(
-            f"inventory:{self.guild}:{self.user}", item.uuid, -qty)
+        self.check(item, qty, await scripts.give(
+            self.redis, [self.redis_key], [item.uuid, qty]))
+
+    async def give(self, other, item, qty=1):
+        "Move items to another inventory, if there are enough of them."
+        if qty < 0:
+            raise commands.CommandError("Negative numbers are not allowed.")
+        self.check(item, qty, await scripts.give(
+            self.redis, [self.redis_key, other.redis_key], [item.uuid, qty]))
+
+    async def wear(self, item):
+        self.check(item, 1, await scripts.wear(
+            self.redis, [self.redis_key, f"wear:{self.guild}:{self.user}"],
+            [item.uuid]))
+
+    async def takeoff(self, item):
+        self.check(item, 1, await scripts.takeoff(
+            self.redis, [self.redis_key, f"wear:{self.guild}:{self.user}"],
+            [item.uuid]))
+
+    @property
+    def redis_key(self):
+        return f"inventory:{self.guild}:{self.user}"
+
+    @staticmethod
+    def check(item, qty, result):
+        "Raise the error matching a failed inventory script."
+        status, value = result[:2]
+        if status == "quantity":
+            raise commands.CommandError(
+                f"You need at least {qty} of {item.name}, "
+                f"you only have {value}")
+        elif status == "wearing" and value:
+            raise commands.CommandError(
+                f"You are already wearing a {item.name}!")
+        elif status == "wearing":
+            raise commands.CommandError(
+                f"You are not wearing a {item.name}!")
 
     async def as_mapping(self):
-        inventory = await self.redis.hgetall(
-            f"inventory:{self.guild}:{self.user}")
-        amounts = {await Item.from_redis(self.redis, item): int(amount)
-                   for item, amount in inventory.items() if int(amount) > 0}
+        inventory = {uuid: int(amount) for uuid, amount in (
+            await self.redis.hgetall(
+                f"inventory:{self.guild}:{self.user}")).items()
+            if int(amount) > 0}
+        items = await Item.many_from_redis(self.redis, inventory.keys())
+        amounts = {item: inventory[item.uuid] for item in items}
 
         missing = []
         for item in amounts.keys():
@@ -219,6 +376,71 @@ class Wallet:
         return int(await self.redis.get(
             f"currency:balance:{self.guild}:{self.user}") or "0")
 
+    async def get_rank(self):
+        "Position of this wallet on the guild leaderboard, starting from 1."
+        rank = await self.redis.zrevrank(
+            f"currency:richest:{self.guild}", self.user)
+        return None if rank is None else rank + 1
+
+    @staticmethod
+    async def richest(redis, guild, start=0, count=5):
+        "List (user ID, balance) pairs from the guild leaderboard."
+        if isinstance(guild, discord.Guild):
+            guild = guild.id
+
+        return [(int(user), int(balance)) for user, balance in
+                await redis.zrevrange(f"currency:richest:{guild}",
+                                      start, start + count - 1,
+                                      withscores=True)]
+
+    @staticmethod
+    async def backfill(redis, guild, chunk_size=1000):
+        """Build the guild leaderboard from existing balances, unless that
+        has already been done."""
+        if isinstance(guild, discord.Guild):
+            guild = guild.id
+
+        if await redis.sismember("currency:richest:backfilled", guild):
+            return
+
+        # Scan the balances themselves rather than the member list, which is
+        # being rebuilt while the bot starts up
+        keys = [key async for key in redis.iscan(
+            match=f"currency:balance:{guild}:*", count=chunk_size)]
+
+        for i in range(0, len(keys), chunk_size):
+            chunk = keys[i:i+chunk_size]
+
+            pairs = []
+            for key, balance in zip(chunk, await redis.mget(*chunk)):
+                if balance is not None:
+                    pairs.extend((int(balance), key.rsplit(":", 1)[1]))
+            if pairs:
+                await redis.zadd(f"currency:richest:{guild}", *pairs)
+
+        await redis.sadd("currency:richest:backfilled", guild)
+
+    @staticmethod
+    async def prune(redis, guild):
+        """Take everyone who is no longer a member of the guild off its
+        leaderboard, for departures missed while the bot was offline."""
+        ranked = await redis.zrange(f"currency:richest:{guild.id}")
+        departed = [user for user in ranked
+                    if guild.get_member(int(user)) is None]
+        if departed:
+            await redis.zrem(f"currency:richest:{guild.id}", *departed)
+
+    async def hide(self):
+        "Take this wallet off the leaderboard, keeping its balance."
+        await self.redis.zrem(f"currency:richest:{self.guild}", self.user)
+
+    async def show(self):
+        "Put this wallet back on the leaderboard, if it has a balance."
+        balance = await self.redis.get(self.redis_key)
+        if balance is not None:
+            await self.redis.zadd(
+                f"currency:richest:{self.guild}", int(balance), self.user)
+
     async def ensure(self, coins):
         if await self.get_balance() < coins:
             raise commands.CommandError(f"You need at least {coins} coins!")
@@ -226,11 +448,61 @@ class Wallet:
     async def add(self, coins):
         if coins < 0:
             raise commands.CommandError("Negative numbers are not allowed.")
-        await self.redis.incrby(
-            f"currency:balance:{self.guild}:{self.user}", coins)
+        await self.change(coins)
 
     async def remove(self, coins):
         if coins < 0:
             raise commands.CommandError("Negative numbers are not allowed.")
-        await self.redis.decrby(
-            f"currency:balance:{self.guild}:{self.user}", coins)
+        await self.settle(coins, 0)
+
+    async def settle(self, stake, payout):
+        """Take stake coins and give back payout coins, as long as the wallet
+        had at least stake coins to begin with. Returns the new balance."""
+        return self.check(stake, await scripts.adjust(
+            self.redis, [self.redis_key, f"currency:richest:{self.guild}"],
+            [payout - stake, stake, self.user]))
+
+    async def pay(self, other, coins):
+        "Move coins to another wallet, if there are enough of them."
+        if coins < 0:
+            raise commands.CommandError("Negative numbers are not allowed.")
+        return self.check(coins, await scripts.pay(
+            self.redis, [self.redis_key, other.redis_key,
+                         f"currency:richest:{self.guild}"],
+            [coins, self.user, other.user]))
+
+    async def buy(self, item, qty=1):
+        """Buy items from the shop at their listed price, returning the total
+        cost."""
+        if qty < 0:
+            raise commands.CommandError("Negative numbers are not allowed.")
+        result = await scripts.buy(
+            self.redis, [self.redis_key, f"currency:richest:{self.guild}",
+                         f"inventory:{self.guild}:{self.user}",
+                         f"shop:prices:{self.guild}:{item.uuid}"],
+            [item.uuid, qty, self.user])
+
+        if result[0] == "for_sale":
+            raise commands.CommandError("Item is not for sale!")
+        self.check(result[2], result)
+        return result[2]
+
+    @property
+    def redis_key(self):
+        return f"currency:balance:{self.guild}:{self.user}"
+
+    @staticmethod
+    def check(coins, result):
+        "Raise the error matching a failed wallet script."
+        status, value = result[:2]
+        if status == "funds":
+            raise commands.CommandError(
+                f"You need at least {coins} coins, you only have {value}!")
+        return value
+
+    async def change(self, coins):
+        # Keep the leaderboard in step with the balance
+        tr = self.redis.multi_exec()
+        tr.incrby(f"currency:balance:{self.guild}:{self.user}", coins)
+        tr.zincrby(f"currency:richest:{self.guild}", coins, self.user)
+        await tr.execute()
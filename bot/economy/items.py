@@ -1,5 +1,6 @@
 import typing
 import json
+import asyncio
 
 import discord
 from discord.ext import commands
@@ -13,6 +14,10 @@ class Items(base.BaseCog):
 
     category = "Economy"
 
+    @commands.Cog.listener()
+    async def on_ready(self):
+        asyncio.create_task(itemlib.cache.listen(self.redis))
+
     @commands.group(invoke_without_command=True)
     @commands.guild_only()
     async def item(self, ctx, item: str):
@@ -38,14 +43,14 @@ class Items(base.BaseCog):
             uuids = await self.redis.smembers(f"items:list:{ctx.guild.id}")
 
         items = []
-        for uuid in uuids:
-            item = await itemlib.Item.from_redis(self.redis, uuid)
+        for item in await itemlib.Item.many_from_redis(self.redis, uuids):
             if item.missing:
                 if user:
                     await self.redis.srem(
-                        f"items:list:{ctx.guild.id}:{user.id}", uuid)
+                        f"items:list:{ctx.guild.id}:{user.id}", item.uuid)
                 else:
-                    await self.redis.srem(f"items:list:{ctx.guild.id}", uuid)
+                    await self.redis.srem(
+                        f"items:list:{ctx.guild.id}", item.uuid)
             else:
                 items.append(item)
 
@@ -173,10 +178,8 @@ class Items(base.BaseCog):
 
         async with itemlib.Inventory(ctx.author, ctx.guild, self.redis) \
                 as inventory:
-            await inventory.remove(item)
-
-        async with itemlib.Inventory(user, ctx.guild, self.redis) as inventory:
-            await inventory.add(item)
+            await inventory.give(
+                itemlib.Inventory(user, ctx.guild, self.redis), item, amount)
 
         await ctx.message.add_reaction("✅")
 
@@ -0,0 +1,92 @@
+from bot.scripts import Script
+
+
+# KEYS: balance, leaderboard
+# ARGV: change, minimum balance required beforehand, user
+adjust = Script("""
+local have = tonumber(redis.call("GET", KEYS[1]) or "0")
+if have < tonumber(ARGV[2]) or have + tonumber(ARGV[1]) < 0 then
+    return {"funds", have}
+end
+
+redis.call("INCRBY", KEYS[1], ARGV[1])
+redis.call("ZINCRBY", KEYS[2], ARGV[1], ARGV[3])
+return {"ok", have + tonumber(ARGV[1])}
+""")
+
+# KEYS: sender balance, recipient balance, leaderboard
+# ARGV: coins, sender, recipient
+pay = Script("""
+local have = tonumber(redis.call("GET", KEYS[1]) or "0")
+if have < tonumber(ARGV[1]) then
+    return {"funds", have}
+end
+
+redis.call("DECRBY", KEYS[1], ARGV[1])
+redis.call("INCRBY", KEYS[2], ARGV[1])
+redis.call("ZINCRBY", KEYS[3], -tonumber(ARGV[1]), ARGV[2])
+redis.call("ZINCRBY", KEYS[3], ARGV[1], ARGV[3])
+return {"ok", have - tonumber(ARGV[1])}
+""")
+
+# KEYS: sender inventory, [recipient inventory]
+# ARGV: item, quantity
+give = Script("""
+local have = tonumber(redis.call("HGET", KEYS[1], ARGV[1]) or "0")
+if have < tonumber(ARGV[2]) then
+    return {"quantity", have}
+end
+
+redis.call("HINCRBY", KEYS[1], ARGV[1], -tonumber(ARGV[2]))
+if #KEYS > 1 then
+    redis.call("HINCRBY", KEYS[2], ARGV[1], ARGV[2])
+end
+return {"ok", have - tonumber(ARGV[2])}
+""")
+
+# KEYS: balance, leaderboard, inventory, price
+# ARGV: item, quantity, user
+buy = Script("""
+local price = redis.call("GET", KEYS[4])
+if not price then
+    return {"for_sale", 0}
+end
+
+local cost = tonumber(price) * tonumber(ARGV[2])
+local have = tonumber(redis.call("GET", KEYS[1]) or "0")
+if have < cost then
+    return {"funds", have, cost}
+end
+
+redis.call("DECRBY", KEYS[1], cost)
+redis.call("ZINCRBY", KEYS[2], -cost, ARGV[3])
+redis.call("HINCRBY", KEYS[3], ARGV[1], ARGV[2])
+return {"ok", have - cost, cost}
+""")
+
+# KEYS: inventory, outfit
+# ARGV: item
+wear = Script("""
+if redis.call("SISMEMBER", KEYS[2], ARGV[1]) == 1 then
+    return {"wearing", 1}
+end
+
+local have = tonumber(redis.call("HGET", KEYS[1], ARGV[1]) or "0")
+if have < 1 then
+    return {"quantity", have}
+end
+
+redis.call("HINCRBY", KEYS[1], ARGV[1], -1)
+redis.call("SADD", KEYS[2], ARGV[1])
+return {"ok", have - 1}
+""")
+
+# KEYS: inventory, outfit
+# ARGV: item
+takeoff = Script("""
+if redis.call("SREM", KEYS[2], ARGV[1]) == 0 then
+    return {"wearing", 0}
+end
+
+return {"ok", redis.call("HINCRBY", KEYS[1], ARGV[1], 1)}
+""")
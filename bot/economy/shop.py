@@ -18,8 +18,9 @@ class Shop(base.BaseCog):
         "List items in the shop :shopping_bags:"
 
         item_uuids = await self.redis.smembers(f"shop:items:{ctx.guild.id}")
-        shop_items = {uuid: await itemlib.Item.from_redis(self.redis, uuid)
-                      for uuid in item_uuids}
+        shop_items = {item.uuid: item for item in
+                      await itemlib.Item.many_from_redis(
+                          self.redis, item_uuids)}
         prices = {}
 
         missing = []
@@ -54,19 +55,8 @@ class Shop(base.BaseCog):
 
         item = await itemlib.Item.from_name(self.redis, ctx.guild.id, item)
 
-        price_ea = await self.redis.get(
-            f"shop:prices:{ctx.guild.id}:{item.uuid}")
-        if price_ea is None:
-            raise commands.CommandError("Item is not for sale!")
-
-        price = int(price_ea) * amount
-
         async with itemlib.Wallet(ctx.author, ctx.guild, self.redis) as wallet:
-            await wallet.remove(price)
-
-        async with itemlib.Inventory(ctx.author, ctx.guild, self.redis) \
-                as inventory:
-            await inventory.add(item, amount)
+            await wallet.buy(item, amount)
 
         await ctx.message.add_reaction("✅")
 
@@ -0,0 +1,189 @@
+import asyncio
+import os
+import time
+
+import aiohttp
+from discord.ext import commands
+
+from bot.scripts import Script
+
+
+class TokenBucket:
+    """Allows bursts of up to capacity calls, refilled at rate calls per
+    second. The bucket is kept in Redis, so every process shares it."""
+
+    # KEYS: bucket
+    # ARGV: rate, capacity, current time
+    TAKE = Script("""
+local rate, capacity = tonumber(ARGV[1]), tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated")
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+
+local status = "wait"
+if tokens >= 1 then
+    tokens = tokens - 1
+    status = "ok"
+end
+
+redis.call("HMSET", KEYS[1], "tokens", tostring(tokens),
+           "updated", tostring(now))
+redis.call("EXPIRE", KEYS[1], math.ceil(capacity / rate) + 1)
+return {status, tostring((1 - tokens) / rate)}
+""")
+
+    def __init__(self, redis, key, rate, capacity):
+        self.redis = redis
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity
+
+    async def acquire(self):
+        while True:
+            status, wait = await self.TAKE(
+                self.redis, [self.key],
+                [self.rate, self.capacity, time.time()])
+            if status == "ok":
+                return
+
+            await asyncio.sleep(float(wait))
+
+
+# Stocks and Forex share an API key, so they share the quota too. The free
+# plan allows 5 calls per minute.
+calls_per_minute = int(os.getenv("ALPHA_VANTAGE_CALLS_PER_MINUTE") or "5")
+
+
+class Batcher:
+    """Collects the keys requested within WINDOW seconds of each other and
+    resolves them with a single call to fetch_many(keys), which returns a
+    mapping of key -> result (or exception)."""
+
+    WINDOW = 0.5
+
+    def __init__(self, fetch_many):
+        self.fetch_many = fetch_many
+        self.queued = {}
+
+    async def get(self, key):
+        if key not in self.queued:
+            if not self.queued:
+                asyncio.get_event_loop().call_later(
+                    self.WINDOW, lambda: asyncio.create_task(self.flush()))
+            self.queued[key] = asyncio.get_event_loop().create_future()
+
+        return await asyncio.shield(self.queued[key])
+
+    async def flush(self):
+        batch, self.queued = self.queued, {}
+
+        try:
+            results = await self.fetch_many(list(batch))
+        except Exception as e:
+            results = {key: e for key in batch}
+
+        for key, future in batch.items():
+            result = results.get(key)
+            if isinstance(result, Exception):
+                future.set_exception(result)
+                # Don't warn if nobody is waiting for this one anymore
+                future.exception()
+            else:
+                future.set_result(result)
+
+
+class AlphaVantage:
+    """Quote provider for Alpha Vantage.
+
+    Tickers requested together (e.g. by one watch tick) are grouped, so each
+    ticker is fetched once, and company names for the whole group come from
+    one lookup in the alphavantage:names hash, where they are kept forever.
+    Every API call waits on the alphavantage:bucket token bucket, which is
+    shared by every process using the API key."""
+
+    URL = "https://www.alphavantage.co/query"
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.session = aiohttp.ClientSession()
+        self.key = os.getenv("ALPHA_VANTAGE_API_KEY")
+        self.limiter = TokenBucket(redis, "alphavantage:bucket",
+                                   calls_per_minute / 60, calls_per_minute)
+
+        self.stocks = Batcher(self.fetch_stocks)
+        self.currencies = Batcher(self.fetch_currencies)
+
+    async def query(self, **params):
+        await self.limiter.acquire()
+
+        async with self.session.get(
+                self.URL, params={**params, "apikey": self.key}) as response:
+            data = await response.json()
+
+        if "Note" in data:
+            raise commands.CommandError(
+                "Alpha Vantage rate limit reached, try again later")
+
+        return data
+
+    async def stock(self, ticker):
+        return await self.stocks.get(ticker.upper())
+
+    async def currency(self, ticker):
+        return await self.currencies.get(ticker.upper())
+
+    async def stock_name(self, ticker):
+        data = await self.query(function="SYMBOL_SEARCH", keywords=ticker)
+        return data["bestMatches"][0]["2. name"]
+
+    async def fetch_stock(self, ticker, name):
+        quote = (await self.query(
+            function="GLOBAL_QUOTE", symbol=ticker)).get("Global Quote")
+
+        if not quote:
+            raise commands.CommandError("Invalid ticker name")
+
+        if name is None:
+            name = await self.stock_name(ticker)
+            await self.redis.hset("alphavantage:names", ticker, name)
+
+        return {
+            "ticker": ticker,
+            "name": name,
+            "type": "stock",
+            "price": float(quote["05. price"])
+        }
+
+    async def fetch_stocks(self, tickers):
+        names = await self.redis.hmget("alphavantage:names", *tickers)
+
+        results = await asyncio.gather(
+            *(self.fetch_stock(ticker, name)
+              for ticker, name in zip(tickers, names)),
+            return_exceptions=True)
+        return dict(zip(tickers, results))
+
+    async def fetch_currency(self, ticker):
+        rate = (await self.query(
+            function="CURRENCY_EXCHANGE_RATE",
+            from_currency=ticker,
+            to_currency="USD")).get("Realtime Currency Exchange Rate")
+
+        if not rate:
+            raise commands.CommandError("Invalid ticker name")
+
+        return {
+            "ticker": ticker,
+            "name": rate["2. From_Currency Name"],
+            "type": "currency",
+            "price": float(rate["5. Exchange Rate"])
+        }
+
+    async def fetch_currencies(self, tickers):
+        results = await asyncio.gather(
+            *(self.fetch_currency(ticker) for ticker in tickers),
+            return_exceptions=True)
+        return dict(zip(tickers, results))
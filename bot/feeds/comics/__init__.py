@@ -6,6 +6,7 @@ from discord.ext import commands
 
 from bot import base
 from bot import watch
+from bot import http_cache
 
 from . import animegirl, xkcd, testcomic
 
@@ -18,11 +19,14 @@ class BaseComics(base.BaseCog, watch.Watchable):
     def __init__(self, bot):
         super().__init__(bot)
         self.session = aiohttp.ClientSession()
+        self.http = http_cache.CachingSession(self.redis, self.session)
 
         for comic in self.comics.values():
-            comic.session = self.session
+            comic.http = self.http
 
-        self.watch = watch.ChannelWatch(self, crontab="*/15 * * * *")
+        self.watch = watch.ChannelWatch(
+            self, crontab="*/5 * * * *",
+            min_interval=15*60, max_interval=3*60*60)
         self.bot.watches["Comics"] = self.watch
 
     async def get_state(self, target):
@@ -1,9 +1,13 @@
+from bot import watch
+
+
 class Comic:
+    @watch.single_flight(ttl=5)
     async def get_url(self, url, type="text", headers={}):
-        async with self.session.get(url, headers=headers) as response:
-            if type == "text":
-                return await response.text()
-            elif type == "bin":
-                return await response.read()
-            elif type == "json":
-                return await response.json()
+        response = await self.http.get(url, headers=headers)
+        if type == "text":
+            return response.text()
+        elif type == "bin":
+            return response.read()
+        elif type == "json":
+            return response.json()
@@ -1,12 +1,9 @@
-import os
-
 import discord
 from discord.ext import commands
 
-import aiohttp
-
 from bot import base
 from bot import watch
+from bot.feeds import alphavantage
 
 
 class Forex(base.BaseCog, watch.Watchable):
@@ -17,10 +14,13 @@ class Forex(base.BaseCog, watch.Watchable):
     def __init__(self, bot):
         super().__init__(bot)
 
-        self.session = aiohttp.ClientSession()
-        self.key = os.getenv("ALPHA_VANTAGE_API_KEY")
+        self.alphavantage = alphavantage.AlphaVantage(self.redis)
 
-        self.watch = watch.MessageWatch(self, "*/5 * * * *")
+        # Quotes are rate limited, so let a tick queue up all of its tickers
+        # and take a few minutes to work through them
+        self.watch = watch.MessageWatch(
+            self, "*/1 * * * *", concurrency=100, timeout=4*60,
+            min_interval=5*60, max_interval=30*60)
         self.bot.watches["Forex"] = self.watch
 
     async def check_target(self, ticker):
@@ -31,28 +31,9 @@ class Forex(base.BaseCog, watch.Watchable):
         else:
             return True
 
+    @watch.single_flight(ttl=5)
     async def get_state(self, ticker):
-        ticker = ticker.upper()
-        async with self.session.get(
-                "https://www.alphavantage.co/query",
-                params={
-                    "function": "CURRENCY_EXCHANGE_RATE",
-                    "from_currency": ticker,
-                    "to_currency": "USD",
-                    "apikey": self.key
-                }) as response:
-            state = (await response.json()).get(
-                "Realtime Currency Exchange Rate")
-
-        if state:
-            return {
-                "ticker": ticker,
-                "name": state["2. From_Currency Name"],
-                "type": "currency",
-                "price": float(state["5. Exchange Rate"])
-            }
-
-        raise commands.CommandError("Invalid ticker name")
+        return await self.alphavantage.currency(ticker)
 
     async def get_hash(self, state):
         return state["price"]
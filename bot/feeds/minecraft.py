@@ -5,6 +5,7 @@ import aiohttp
 
 from bot import base
 from bot import watch
+from bot import http_cache
 
 
 class Minecraft(base.BaseCog, watch.Watchable):
@@ -16,18 +17,20 @@ class Minecraft(base.BaseCog, watch.Watchable):
         super().__init__(bot)
 
         self.session = aiohttp.ClientSession()
-        self.watch = watch.MessageWatch(self)
+        self.http = http_cache.CachingSession(self.redis, self.session)
+        self.watch = watch.MessageWatch(
+            self, min_interval=60, max_interval=10*60)
         self.bot.watches["Minecraft"] = self.watch
 
+    @watch.single_flight(ttl=5)
     async def get_state(self, ip):
-        async with self.session.get(
-                f"https://mcstatus.breq.dev/status?server={ip}") as response:
-            code = response.status
-            status = await response.json()
+        response = await self.http.get(
+            "https://mcstatus.breq.dev/status", params={"server": ip})
 
-        if code != 200:
+        if response.status != 200:
             return "Can't connect to server", (0, 0), []
 
+        status = response.json()
         description = []
 
         # Use a zero width space to ensure proper Markdown rendering
@@ -5,6 +5,7 @@ from discord.ext import commands
 
 from bot import base
 from bot import watch
+from bot import http_cache
 
 
 class BaseReddit(
@@ -15,6 +16,7 @@ class BaseReddit(
     def __init__(self, bot):
         super().__init__(bot)
         self.session = aiohttp.ClientSession()
+        self.http = http_cache.CachingSession(self.redis, self.session)
 
         self.watch = watch.ChannelWatch(self, crontab="00 00 * * *")
         # self.watch = watch.ChannelWatch(self, crontab="* * * * *")
@@ -24,10 +26,10 @@ class BaseReddit(
         return target in config
 
     async def get_state(self, config_name, channel_id=""):
-        async with self.session.get(
-                f"https://redditor.breq.dev/{config_name}",
-                params={"channel": f"breqbot:{channel_id}"}) as response:
-            return await response.json()
+        response = await self.http.get(
+            f"https://redditor.breq.dev/{config_name}",
+            params={"channel": f"breqbot:{channel_id}"})
+        return response.json()
 
     async def get_response(self, post):
         if post.get("text"):
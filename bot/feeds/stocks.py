@@ -1,12 +1,9 @@
-import os
-
 import discord
 from discord.ext import commands
 
-import aiohttp
-
 from bot import base
 from bot import watch
+from bot.feeds import alphavantage
 
 
 class Stocks(base.BaseCog, watch.Watchable):
@@ -17,22 +14,15 @@ class Stocks(base.BaseCog, watch.Watchable):
     def __init__(self, bot):
         super().__init__(bot)
 
-        self.session = aiohttp.ClientSession()
-        self.key = os.getenv("ALPHA_VANTAGE_API_KEY")
+        self.alphavantage = alphavantage.AlphaVantage(self.redis)
 
-        self.watch = watch.MessageWatch(self, "*/5 * * * *")
+        # Quotes are rate limited, so let a tick queue up all of its tickers
+        # and take a few minutes to work through them
+        self.watch = watch.MessageWatch(
+            self, "*/1 * * * *", concurrency=100, timeout=4*60,
+            min_interval=5*60, max_interval=30*60)
         self.bot.watches["Stocks"] = self.watch
 
-    async def get_stock_name(self, ticker):
-        async with self.session.get(
-                "https://www.alphavantage.co/query",
-                params={
-                    "function": "SYMBOL_SEARCH",
-                    "keywords": ticker,
-                    "apikey": self.key
-                }) as response:
-            return (await response.json())["bestMatches"][0]["2. name"]
-
     async def check_target(self, ticker):
         try:
             await self.get_state(ticker)
@@ -41,26 +31,9 @@ class Stocks(base.BaseCog, watch.Watchable):
         else:
             return True
 
+    @watch.single_flight(ttl=5)
     async def get_state(self, ticker):
-        ticker = ticker.upper()
-        async with self.session.get(
-                "https://www.alphavantage.co/query",
-                params={
-                    "function": "GLOBAL_QUOTE",
-                    "symbol": ticker,
-                    "apikey": self.key
-                }) as response:
-            state = (await response.json())["Global Quote"]
-
-        if state:
-            return {
-                "ticker": ticker,
-                "name": await self.get_stock_name(ticker),
-                "type": "stock",
-                "price": float(state["05. price"])
-            }
-
-        raise commands.CommandError("Invalid ticker name")
+        return await self.alphavantage.stock(ticker)
 
     async def get_hash(self, state):
         return state["price"]
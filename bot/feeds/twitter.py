@@ -6,6 +6,7 @@ from discord.ext import commands
 
 from bot import base
 from bot import watch
+from bot import http_cache
 
 
 class Twitter(base.BaseCog, watch.Watchable):
@@ -18,8 +19,11 @@ class Twitter(base.BaseCog, watch.Watchable):
         self.session = aiohttp.ClientSession(headers={
             "Authorization": f"Bearer {os.getenv('TWITTER_API_BEARER')}"
         })
+        self.http = http_cache.CachingSession(self.redis, self.session)
 
-        self.watch = watch.ChannelWatch(self, crontab="*/5 * * * *")
+        self.watch = watch.ChannelWatch(
+            self, crontab="*/1 * * * *",
+            min_interval=5*60, max_interval=30*60)
         self.bot.watches["Twitter"] = self.watch
 
     async def get_user_by_username(self, username):
@@ -28,35 +32,32 @@ class Twitter(base.BaseCog, watch.Watchable):
 
         fields = ["id", "description", "name", "profile_image_url", "username"]
 
-        async with self.session.get(
-                f"https://api.twitter.com/2/users/by/username/{username}",
-                params={"user.fields": ",".join(fields)}
-                ) as response:
-            response = await response.json()
+        response = (await self.http.get(
+            f"https://api.twitter.com/2/users/by/username/{username}",
+            params={"user.fields": ",".join(fields)})).json()
 
         return response["data"]
 
+    @watch.single_flight(ttl=10*60)
     async def get_user_by_id(self, id):
         fields = ["id", "description", "name", "profile_image_url", "username"]
 
-        async with self.session.get(
-                f"https://api.twitter.com/2/users/{id}",
-                params={"user.fields": ",".join(fields)}
-                ) as response:
-            response = await response.json()
+        response = (await self.http.get(
+            f"https://api.twitter.com/2/users/{id}",
+            params={"user.fields": ",".join(fields)})).json()
 
         return response["data"]
 
+    @watch.single_flight(ttl=5)
     async def get_state(self, id):
-        async with self.session.get(
-                f"https://api.twitter.com/2/users/{id}/tweets",
-                params={
-                    "exclude": "retweets,replies",
-                    "tweet.fields": "author_id,created_at",
-                    "expansions": "attachments.media_keys",
-                    "media.fields": "url"
-                }) as response:
-            response = await response.json()
+        response = (await self.http.get(
+            f"https://api.twitter.com/2/users/{id}/tweets",
+            params={
+                "exclude": "retweets,replies",
+                "tweet.fields": "author_id,created_at",
+                "expansions": "attachments.media_keys",
+                "media.fields": "url"
+            })).json()
 
         if response["meta"]["result_count"] < 1:
             raise commands.CommandError("No tweets found!")
@@ -1,3 +1,5 @@
+import time
+
 import discord
 from discord.ext import commands
 
@@ -64,6 +66,37 @@ class Watching(base.BaseCog):
 
         await ctx.send(embed=embed)
 
+    @watching.command()
+    async def stats(self, ctx):
+        "Show how long each watch takes to poll its feeds"
+
+        embed = discord.Embed(title="Watch statistics")
+
+        def fmt(timing):
+            if timing["p50"] is None:
+                return "-"
+            return f"{timing['p50']:.2f}s / {timing['p95']:.2f}s"
+
+        for name, watch_instance in self.bot.watches.items():
+            stats = await watch_instance.get_stats()
+
+            lines = [f"{stage}: {fmt(timing)}"
+                     for stage, timing in stats["timings"].items()]
+
+            lines.append(f"errors: {sum(stats['errors'].values())}")
+            if stats["durations"]:
+                slowest = max(stats["durations"].values())
+                lines.append(f"slowest target: {slowest:.2f}s")
+            if stats["last_success"]:
+                oldest = time.time() - min(stats["last_success"].values())
+                lines.append(f"oldest success: {int(oldest // 60)}m ago")
+
+            embed.add_field(name=name, value="\n".join(lines))
+
+        embed.set_footer(text="Timings are p50 / p95")
+
+        await ctx.send(embed=embed)
+
     @commands.command()
     @commands.dm_only()
     async def rmwatch(self, ctx, *, message: discord.Message):
@@ -6,6 +6,7 @@ from discord.ext import commands
 
 from bot import base
 from bot import watch
+from bot import http_cache
 
 
 class Youtube(base.BaseCog, watch.Watchable):
@@ -16,42 +17,45 @@ class Youtube(base.BaseCog, watch.Watchable):
     def __init__(self, bot):
         super().__init__(bot)
         self.session = aiohttp.ClientSession()
+        self.http = http_cache.CachingSession(self.redis, self.session)
         self.key = os.getenv("YOUTUBE_API_KEY")
 
-        self.watch = watch.ChannelWatch(self, crontab="*/30 * * * *")
+        self.watch = watch.ChannelWatch(
+            self, crontab="*/5 * * * *",
+            min_interval=30*60, max_interval=2*60*60)
         self.bot.watches["Youtube"] = self.watch
 
+    @watch.single_flight(ttl=60*60)
     async def get_channel(self, search, nsfw=None):
-        async with self.session.get(
-                "https://youtube.googleapis.com/youtube/v3/search",
-                params={
-                    "part": "snippet",
-                    "maxResults": "1",
-                    "q": search,
-                    "safeSearch": ("none" if nsfw else "moderate"),
-                    "type": "channel",
-                    "key": self.key
-                }) as response:
-            response = await response.json()
+        response = (await self.http.get(
+            "https://youtube.googleapis.com/youtube/v3/search",
+            params={
+                "part": "snippet",
+                "maxResults": "1",
+                "q": search,
+                "safeSearch": ("none" if nsfw else "moderate"),
+                "type": "channel",
+                "key": self.key
+            })).json()
 
         if response["pageInfo"]["totalResults"] < 1:
             raise commands.CommandError("No results found!")
 
         return response["items"][0]
 
+    @watch.single_flight(ttl=5)
     async def get_state(self, channel_id, nsfw=None):
-        async with self.session.get(
-                "https://youtube.googleapis.com/youtube/v3/search",
-                params={
-                    "part": "snippet",
-                    "channelId": channel_id,
-                    "maxResults": "1",
-                    "order": "date",
-                    "safeSearch": ("none" if nsfw else "moderate"),
-                    "type": "video",
-                    "key": self.key
-                }) as response:
-            response = await response.json()
+        response = (await self.http.get(
+            "https://youtube.googleapis.com/youtube/v3/search",
+            params={
+                "part": "snippet",
+                "channelId": channel_id,
+                "maxResults": "1",
+                "order": "date",
+                "safeSearch": ("none" if nsfw else "moderate"),
+                "type": "video",
+                "key": self.key
+            })).json()
 
         if response["pageInfo"]["totalResults"] < 1:
             raise commands.CommandError("No videos found!")
@@ -76,16 +80,16 @@ class Youtube(base.BaseCog, watch.Watchable):
     async def human_targets(self, targets):
         return [await self.channel_name(id) for id in targets]
 
+    @watch.single_flight(ttl=60*60)
     async def channel_name(self, channel_id):
-        async with self.session.get(
-                "https://youtube.googleapis.com/youtube/v3/channels",
-                params={
-                    "part": "snippet",
-                    "id": channel_id,
-                    "maxResults": "1",
-                    "key": self.key
-                }) as response:
-            response = await response.json()
+        response = (await self.http.get(
+            "https://youtube.googleapis.com/youtube/v3/channels",
+            params={
+                "part": "snippet",
+                "id": channel_id,
+                "maxResults": "1",
+                "key": self.key
+            })).json()
 
         if response["pageInfo"]["totalResults"] < 1:
             raise commands.CommandError("No results found!")
@@ -0,0 +1,88 @@
+import asyncio
+import traceback
+
+
+class Flags:
+    """Local snapshot of the flags checked on every command: the banned user
+    list and the per-channel NSFW switches.
+
+    Any change bumps the flags:version counter and publishes the new version
+    on flags:invalidate, which makes every process drop its snapshot. The
+    banned list is then reloaded in full, and NSFW switches are fetched
+    again the next time each channel is checked.
+
+    There is no snapshot (version is None) while this process isn't
+    subscribed, since invalidations would be missed, and checks go to Redis
+    instead."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.redis = bot.redis
+
+        self.version = None
+        self.banned = set()
+        self.nsfw = {}
+
+        self.listening = False
+
+        @self.bot.listen()
+        async def on_ready():
+            if not self.listening:
+                self.listening = True
+                asyncio.create_task(self.listen())
+
+    async def load(self):
+        pipe = self.redis.pipeline()
+        pipe.get("flags:version")
+        pipe.smembers("user:banned:list")
+        version, banned = await pipe.execute()
+
+        self.version = int(version or "0")
+        self.banned = set(banned)
+        self.nsfw = {}
+
+    async def listen(self):
+        while True:
+            try:
+                channel, = await self.redis.subscribe("flags:invalidate")
+                # Anything changed before subscribing must not be missed
+                await self.load()
+
+                async for version in channel.iter(encoding="utf-8"):
+                    if int(version) != self.version:
+                        try:
+                            await self.load()
+                        except Exception:
+                            # Retried on the next invalidation
+                            self.version = None
+                            traceback.print_exc()
+            except Exception:
+                traceback.print_exc()
+            finally:
+                self.version = None
+
+            await asyncio.sleep(1)
+
+    async def invalidate(self):
+        version = await self.redis.incr("flags:version")
+        await self.redis.publish("flags:invalidate", version)
+
+    async def is_banned(self, user_id):
+        if self.version is None:
+            return bool(await self.redis.sismember(
+                "user:banned:list", str(user_id)))
+        return str(user_id) in self.banned
+
+    async def is_nsfw(self, guild_id, channel_id):
+        key = (guild_id, channel_id)
+        if self.version is None or key not in self.nsfw:
+            version = self.version
+            nsfw = bool(int(await self.redis.get(
+                f"channel:{guild_id}:{channel_id}:nsfw") or "0"))
+
+            # Don't keep the value if the snapshot was dropped meanwhile
+            if version is None or version != self.version:
+                return nsfw
+            self.nsfw[key] = nsfw
+
+        return self.nsfw[key]
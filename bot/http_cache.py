@@ -0,0 +1,115 @@
+import hashlib
+import json
+
+import yarl
+
+
+class CachedResponse:
+    "The status and body of a GET, whether it came from the network or cache"
+
+    def __init__(self, status, body, cached=False):
+        self.status = status
+        self.body = body
+        self.cached = cached
+
+    def read(self):
+        return self.body
+
+    def text(self):
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class CachingSession:
+    """Wraps an aiohttp session to make conditional GET requests.
+
+    Validators (ETag / Last-Modified) and bodies of successful responses are
+    stored in Redis. Later requests for the same URL send If-None-Match and
+    If-Modified-Since, and a 304 Not Modified is answered from the cache.
+
+    Only text, JSON and XML bodies are stored: images and other downloads
+    are rarely fetched twice and would fill Redis."""
+
+    # Don't store bodies larger than this (in bytes) in Redis
+    MAX_SIZE = 1024 * 1024
+
+    # Seconds to keep an entry around after it was last refreshed
+    EXPIRE = 7 * 24 * 60 * 60
+
+    def __init__(self, redis, session):
+        self.redis = redis
+        self.session = session
+
+    @staticmethod
+    def cacheable(content_type):
+        return (content_type.startswith("text/")
+                or content_type.endswith(("json", "xml")))
+
+    @staticmethod
+    def cache_key(url, params=None):
+        url = yarl.URL(url)
+        if params:
+            url = url.update_query(params)
+        digest = hashlib.sha1(str(url).encode()).hexdigest()
+        return f"httpcache:{digest}"
+
+    async def get(self, url, params=None, headers=None):
+        key = self.cache_key(url, params)
+        cached = await self.redis.hgetall(key, encoding=None)
+
+        request_headers = dict(headers or {})
+        if cached.get(b"etag"):
+            request_headers["If-None-Match"] = cached[b"etag"].decode()
+        if cached.get(b"last_modified"):
+            request_headers["If-Modified-Since"] = \
+                cached[b"last_modified"].decode()
+
+        async with self.session.get(
+                url, params=params, headers=request_headers) as response:
+            status = response.status
+            if status != 304:
+                body = await response.read()
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            content_type = response.content_type
+
+        if status == 304 and b"body" in cached:
+            pipe = self.redis.pipeline()
+            pipe.hincrby("httpcache:stats", "hits", 1)
+            pipe.expire(key, self.EXPIRE)
+            await pipe.execute()
+            return CachedResponse(
+                int(cached[b"status"]), cached[b"body"], cached=True)
+
+        if status == 304:
+            # The server thinks we have a copy, but we don't: ask again
+            # without validators
+            async with self.session.get(
+                    url, params=params, headers=headers) as response:
+                status = response.status
+                body = await response.read()
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                content_type = response.content_type
+
+        pipe = self.redis.pipeline()
+        pipe.hincrby("httpcache:stats", "misses", 1)
+
+        if status == 200 and (etag or last_modified) \
+                and self.cacheable(content_type) \
+                and len(body) <= self.MAX_SIZE:
+            entry = {"status": status, "body": body}
+            if etag:
+                entry["etag"] = etag
+            if last_modified:
+                entry["last_modified"] = last_modified
+
+            pipe.delete(key)
+            pipe.hmset_dict(key, entry)
+            pipe.expire(key, self.EXPIRE)
+
+        await pipe.execute()
+
+        return CachedResponse(status, body)
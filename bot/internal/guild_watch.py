@@ -1,3 +1,7 @@
+import asyncio
+import time
+import traceback
+
 from discord.ext import commands
 
 from bot import base
@@ -7,36 +11,97 @@ class GuildWatch(base.BaseCog):
 
     category = "Internal"
 
+    # Members read and written per pipeline while syncing
+    CHUNK = 1000
+
+    # Seconds to buffer member updates for before writing them together
+    FLUSH_DELAY = 0.3
+
+    def __init__(self, bot):
+        super().__init__(bot)
+
+        # (guild ID, member ID) -> member, for updates not yet written
+        self.pending = {}
+
     @commands.Cog.listener()
     async def on_ready(self):
-        await self.redis.delete("guild:list")
-        await self.redis.delete("user:list")
+        start = time.monotonic()
+        stats = {"guilds": len(self.bot.guilds), "members": 0, "changed": 0}
 
-        await self.redis.sadd(
-            "guild:list", *(guild.id for guild in self.bot.guilds))
+        await self.sync_set("guild:list",
+                            {str(guild.id) for guild in self.bot.guilds})
+        await self.sync_set("user:list",
+                            {str(member.id)
+                             for member in self.bot.get_all_members()})
 
         # Cache of guild ID -> name, guild member list, user ID -> name, etc
-        for guild in self.bot.guilds:
-            await self.redis.hset(f"guild:{guild.id}", "name", guild.name)
+        for idx, guild in enumerate(self.bot.guilds):
+            members, changed = await self.sync_guild(guild)
+            stats["members"] += members
+            stats["changed"] += changed
+
+            print(f"Synced guild {idx + 1}/{len(self.bot.guilds)}: "
+                  f"{changed}/{members} members changed")
+
+        stats["seconds"] = round(time.monotonic() - start, 3)
+        stats["time"] = time.time()
+        await self.redis.hmset_dict("guild:sync:last", stats)
+
+        print(f"Synced {stats['members']} members in {stats['guilds']} "
+              f"guilds in {stats['seconds']}s, "
+              f"{stats['changed']} changed")
+
+    async def sync_set(self, key, members):
+        "Make a set hold exactly members, without emptying it in between."
+        current = set(await self.redis.smembers(key))
+
+        pipe = self.redis.pipeline()
+        if members - current:
+            pipe.sadd(key, *(members - current))
+        if current - members:
+            pipe.srem(key, *(current - members))
+        await pipe.execute()
+
+    async def sync_guild(self, guild):
+        """Bring the cached name and member list of a guild, and the name and
+        avatar of each member, up to date. Only members that changed since
+        the last sync are written. Returns the number of members and the
+        number of them that changed."""
 
-            await self.redis.delete(f"guild:member:{guild.id}")
-            await self.redis.sadd(
-                f"guild:member:{guild.id}",
-                *(member.id for member in guild.members))
-
-            await self.redis.sadd(
-                "user:list", *(member.id for member in guild.members))
-
-        for member in self.bot.get_all_members():
-            await self.redis.set(
-                f"user:name:{member.guild.id}:{member.id}",
-                member.display_name)
-            await self.redis.hset(
-                f"profile:{member.guild.id}:{member.id}",
-                "pfp", str(member.avatar_url))
+        await self.redis.hset(f"guild:{guild.id}", "name", guild.name)
+        await self.sync_set(f"guild:member:{guild.id}",
+                            {str(member.id) for member in guild.members})
+
+        members = guild.members
+        changed = 0
+
+        for i in range(0, len(members), self.CHUNK):
+            chunk = members[i:i+self.CHUNK]
+
+            pipe = self.redis.pipeline()
+            pipe.mget(*(f"user:name:{guild.id}:{member.id}"
+                        for member in chunk))
+            for member in chunk:
+                pipe.hget(f"profile:{guild.id}:{member.id}", "pfp")
+            names, *pfps = await pipe.execute()
+
+            pipe = self.redis.pipeline()
+            for member, name, pfp in zip(chunk, names, pfps):
+                if name != member.display_name:
+                    pipe.set(f"user:name:{guild.id}:{member.id}",
+                             member.display_name)
+                if pfp != str(member.avatar_url):
+                    pipe.hset(f"profile:{guild.id}:{member.id}",
+                              "pfp", str(member.avatar_url))
+                changed += (name != member.display_name
+                            or pfp != str(member.avatar_url))
+            await pipe.execute()
+
+        return len(members), changed
 
     @commands.Cog.listener()
     async def on_member_join(self, member):
+        self.bot.member_index.add(member)
         await self.redis.sadd(f"guild:member:{member.guild.id}", member.id)
         await self.redis.sadd("user:list", member.id)
         await self.redis.set(
@@ -46,18 +111,47 @@ class GuildWatch(base.BaseCog):
             "pfp", str(member.avatar_url))
 
     @commands.Cog.listener()
-    async def on_member_leave(self, member):
-        await self.redis.srem(f"guild:member:{member.guild.id}", member.id)
-        await self.redis.delete(f"user:name:{member.guild.id}:{member.id}")
-        await self.redis.delete(f"profile:{member.guild.id}:{member.id}")
+    async def on_member_remove(self, member):
+        """Drop what is cached about a member who left. Their profile is
+        kept apart from the cached avatar, since the description and
+        background in it were written by the member and should still be
+        there if they rejoin."""
+        self.pending.pop((member.guild.id, member.id), None)
+        self.bot.member_index.remove(member)
+
+        pipe = self.redis.pipeline()
+        pipe.srem(f"guild:member:{member.guild.id}", member.id)
+        pipe.delete(f"user:name:{member.guild.id}:{member.id}")
+        pipe.hdel(f"profile:{member.guild.id}:{member.id}", "pfp")
+        await pipe.execute()
 
     @commands.Cog.listener()
     async def on_member_update(self, old, member):
-        await self.redis.set(
-            f"user:name:{member.guild.id}:{member.id}", member.display_name)
-        await self.redis.hset(
-            f"profile:{member.guild.id}:{member.id}",
-            "pfp", str(member.avatar_url))
+        # Most updates are presence or role changes, which aren't cached
+        if old.display_name == member.display_name \
+                and old.avatar_url == member.avatar_url:
+            return
+
+        self.bot.member_index.add(member)
+
+        if not self.pending:
+            asyncio.get_event_loop().call_later(
+                self.FLUSH_DELAY, lambda: asyncio.create_task(self.flush()))
+        self.pending[(member.guild.id, member.id)] = member
+
+    async def flush(self):
+        pending, self.pending = self.pending, {}
+
+        pipe = self.redis.pipeline()
+        for (guild_id, member_id), member in pending.items():
+            pipe.set(f"user:name:{guild_id}:{member_id}", member.display_name)
+            pipe.hset(f"profile:{guild_id}:{member_id}",
+                      "pfp", str(member.avatar_url))
+
+        try:
+            await pipe.execute()
+        except Exception:
+            traceback.print_exc()
 
     @commands.Cog.listener()
     async def on_user_update(self, old, user):
@@ -67,26 +161,21 @@ class GuildWatch(base.BaseCog):
     @commands.Cog.listener()
     async def on_guild_join(self, guild):
         await self.redis.sadd("guild:list", guild.id)
-        await self.redis.hset(f"guild:{guild.id}", "name", guild.name)
-
-        await self.redis.delete(f"guild:member:{guild.id}")
-        await self.redis.sadd(f"guild:member:{guild.id}",
-                              *(member.id for member in guild.members))
-
-        for member in guild.members:
-            await self.redis.set(
-                f"user:name:{member.guild.id}:{member.id}",
-                member.display_name)
-            await self.redis.hset(
-                f"profile:{member.guild.id}:{member.id}",
-                "pfp", str(member.avatar_url))
-            await self.redis.sadd("user:list", member.id)
+        await self.redis.sadd(
+            "user:list", *(member.id for member in guild.members))
+        await self.sync_guild(guild)
 
     @commands.Cog.listener()
-    async def on_guild_leave(self, guild):
-        await self.redis.srem("guild:list", guild.id)
-        await self.redis.delete(f"guild:{guild.id}")
-        await self.redis.delete(f"guild:member:{guild.id}")
+    async def on_guild_remove(self, guild):
+        """Drop the member list of a guild the bot left. The guild:<id> hash
+        is kept, since it holds settings such as the website switch as well
+        as the cached name, and member profiles are kept too."""
+        self.bot.member_index.drop(guild)
+
+        pipe = self.redis.pipeline()
+        pipe.srem("guild:list", guild.id)
+        pipe.delete(f"guild:member:{guild.id}")
+        await pipe.execute()
 
 
 def setup(bot):
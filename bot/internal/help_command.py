@@ -1,6 +1,41 @@
+import time
+
 import discord
 from discord.ext import commands
 
+from bot import base
+
+
+class HelpCache:
+    """Help embeds that have already been built, keyed by what affects their
+    contents: the guild, whether the channel is NSFW, and the permissions
+    commands check for.
+
+    Entries expire after TTL seconds, since some cogs list guild data in
+    their help, and are all dropped when the set of loaded cogs changes."""
+
+    TTL = 60
+
+    def __init__(self):
+        self.entries = {}
+        self.cogs = None
+
+    def get(self, bot, key):
+        cogs = tuple(id(cog) for cog in bot.cogs.values())
+        if cogs != self.cogs:
+            self.entries = {}
+            self.cogs = cogs
+
+        expiry, embed = self.entries.get(key, (0, None))
+        if expiry > time.monotonic():
+            return embed
+
+    def put(self, key, embed):
+        self.entries[key] = (time.monotonic() + self.TTL, embed)
+
+
+cache = HelpCache()
+
 
 class HelpCommand(commands.HelpCommand):
 
@@ -38,7 +73,30 @@ class HelpCommand(commands.HelpCommand):
         }
         return mapping
 
+    async def context_key(self):
+        "Describe everything about the context that the help depends on."
+        ctx = self.context
+        if not ctx.guild:
+            return (None,)
+
+        permissions = ctx.author.guild_permissions
+        return (ctx.guild.id,
+                await base.ctx_is_nsfw(ctx),
+                await base.config_only(ctx),
+                permissions.manage_messages,
+                permissions.manage_guild,
+                permissions.manage_roles)
+
     async def send_bot_help(self, mapping):
+        key = ("bot", await self.context_key())
+        embed = cache.get(self.context.bot, key)
+        if not embed:
+            embed = await self.build_bot_help(mapping)
+            cache.put(key, embed)
+
+        await self.context.send(embed=embed)
+
+    async def build_bot_help(self, mapping):
         embed = discord.Embed(
             title=("Hi, I'm Breqbot! Beep boop :robot:. "
                    f"Try `{self.context.bot.main_prefix}info`!"))
@@ -70,13 +128,22 @@ class HelpCommand(commands.HelpCommand):
         for category, desc in description.items():
             embed.add_field(name=category, value="".join(desc), inline=False)
 
-        await self.context.send(embed=embed)
+        return embed
 
     async def send_cog_help(self, cog):
         if hasattr(cog, "custom_cog_help"):
             await cog.custom_cog_help(self.context)
             return
 
+        key = ("cog", cog.qualified_name, await self.context_key())
+        embed = cache.get(self.context.bot, key)
+        if not embed:
+            embed = await self.build_cog_help(cog)
+            cache.put(key, embed)
+
+        await self.context.channel.send(embed=embed)
+
+    async def build_cog_help(self, cog):
         embed = discord.Embed()
         embed.title = f"{cog.qualified_name} | {cog.description}"
 
@@ -93,7 +160,7 @@ class HelpCommand(commands.HelpCommand):
             embed.description = (f"No commands from {cog.qualified_name}"
                                  " are usable here.")
 
-        await self.context.channel.send(embed=embed)
+        return embed
 
     async def send_group_help(self, group):
         embed = discord.Embed()
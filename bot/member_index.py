@@ -0,0 +1,101 @@
+import asyncio
+import collections
+
+from fuzzywuzzy import process
+
+
+def trigrams(text):
+    text = f"  {text.lower()} "
+    return {text[i:i+3] for i in range(len(text) - 2)}
+
+
+class GuildIndex:
+    "Display names of the members of one guild, indexed by trigram."
+
+    def __init__(self, members=()):
+        self.names = {}
+        self.index = collections.defaultdict(set)
+
+        for member in members:
+            self.add(member.id, member.display_name)
+
+    def add(self, member_id, name):
+        self.remove(member_id)
+
+        self.names[member_id] = name
+        for trigram in trigrams(name):
+            self.index[trigram].add(member_id)
+
+    def remove(self, member_id):
+        name = self.names.pop(member_id, None)
+        if name is None:
+            return
+
+        for trigram in trigrams(name):
+            self.index[trigram].discard(member_id)
+            if not self.index[trigram]:
+                del self.index[trigram]
+
+    def candidates(self, text, limit):
+        "Up to limit members sharing the most trigrams with text."
+        if len(self.names) <= limit:
+            return dict(self.names)
+
+        counts = collections.Counter()
+        for trigram in trigrams(text):
+            counts.update(self.index.get(trigram, ()))
+
+        return {member_id: self.names[member_id]
+                for member_id, _ in counts.most_common(limit)}
+
+
+class MemberIndex:
+    """Finds the member of a guild whose display name best matches some
+    text, for FuzzyMember.
+
+    Names are narrowed down to the CANDIDATES sharing the most trigrams with
+    the text, and only those are scored, in an executor. A guild is indexed
+    the first time it is searched, and GuildWatch keeps it up to date from
+    then on."""
+
+    CANDIDATES = 100
+
+    def __init__(self):
+        self.guilds = {}
+
+    def add(self, member):
+        if member.guild.id in self.guilds:
+            self.guilds[member.guild.id].add(member.id, member.display_name)
+
+    def remove(self, member):
+        if member.guild.id in self.guilds:
+            self.guilds[member.guild.id].remove(member.id)
+
+    def drop(self, guild):
+        self.guilds.pop(guild.id, None)
+
+    async def search(self, guild, text):
+        "Return (member, score) for the best match, or (None, 0)."
+        if guild.id not in self.guilds:
+            self.guilds[guild.id] = GuildIndex(guild.members)
+
+        index = self.guilds[guild.id]
+        names = index.candidates(text, self.CANDIDATES)
+
+        # Drop anyone who left without the index hearing about it
+        for member_id in [member_id for member_id in names
+                          if guild.get_member(member_id) is None]:
+            index.remove(member_id)
+            del names[member_id]
+
+        if not names:
+            return None, 0
+
+        match = await asyncio.get_event_loop().run_in_executor(
+            None, process.extractOne, text, names)
+        if not match:
+            return None, 0
+
+        # With a dict, extractOne returns (name, score, key)
+        _, score, member_id = match
+        return guild.get_member(member_id), score
@@ -21,19 +21,9 @@ class Outfit(base.BaseCog):
         if not int(item.wearable):
             raise commands.CommandError("Item is not wearable!")
 
-        wearing = await self.redis.sismember(
-            f"wear:{ctx.guild.id}:{ctx.author.id}", item.uuid)
-
-        if wearing:
-            raise commands.CommandError(
-                f"You are already wearing a {item.name}!")
-
         async with itemlib.Inventory(ctx.author, ctx.guild, self.redis) \
                 as inventory:
-            await inventory.remove(item)
-
-        await self.redis.sadd(
-            f"wear:{ctx.guild.id}:{ctx.author.id}", item.uuid)
+            await inventory.wear(item)
 
         await ctx.message.add_reaction("✅")
 
@@ -43,19 +33,9 @@ class Outfit(base.BaseCog):
         "Take off an item :x:"
         item = await itemlib.Item.from_name(self.redis, ctx.guild.id, item)
 
-        wearing = await self.redis.sismember(
-            f"wear:{ctx.guild.id}:{ctx.author.id}", item.uuid)
-
-        if not wearing:
-            raise commands.CommandError(
-                f"You are not wearing a {item.name}!")
-
-        await self.redis.srem(
-            f"wear:{ctx.guild.id}:{ctx.author.id}", item.uuid)
-
         async with itemlib.Inventory(ctx.author, ctx.guild, self.redis) \
                 as inventory:
-            await inventory.add(item)
+            await inventory.takeoff(item)
 
         await ctx.message.add_reaction("✅")
 
@@ -68,9 +48,9 @@ class Outfit(base.BaseCog):
 
         embed = discord.Embed(title=f"{user.display_name} is wearing...")
 
-        items = [await itemlib.Item.from_redis(self.redis, uuid)
-                 for uuid in (await self.redis.smembers(
-                     f"wear:{ctx.guild.id}:{user.id}"))]
+        items = await itemlib.Item.many_from_redis(
+            self.redis, await self.redis.smembers(
+                f"wear:{ctx.guild.id}:{user.id}"))
 
         missing = []
         for item in items:
@@ -0,0 +1,25 @@
+import hashlib
+
+import aioredis
+
+
+class Script:
+    """A Lua script run on the Redis server, so that its checks and writes
+    happen atomically in one round trip.
+
+    It is called by SHA1 digest, and the source is only sent when the server
+    doesn't have it cached yet. Scripts return a list whose first element is
+    "ok" or the name of the check that failed."""
+
+    def __init__(self, source):
+        self.source = source
+        self.sha = hashlib.sha1(source.encode()).hexdigest()
+
+    async def __call__(self, redis, keys=(), args=()):
+        keys, args = list(keys), list(args)
+        try:
+            return await redis.evalsha(self.sha, keys=keys, args=args)
+        except aioredis.ReplyError as e:
+            if not str(e).startswith("NOSCRIPT"):
+                raise
+            return await redis.eval(self.source, keys=keys, args=args)
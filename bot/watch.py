@@ -1,8 +1,134 @@
+import asyncio
+import collections
+import contextlib
+import functools
+import hashlib
+import os
+import time
+import traceback
+import uuid
+
 import aiocron
 
 import discord
 from discord.ext import commands
 
+from bot import watch_stats
+from bot.scripts import Script
+
+
+def single_flight(ttl=60):
+    """Decorator for Watchable methods that fetch from an upstream.
+
+    Concurrent calls with the same arguments share a single in-flight call,
+    and its result is reused for ttl seconds afterwards. Exceptions are
+    passed to every waiting caller but never cached.
+
+    For a watch's get_state, keep ttl to a few seconds: if it comes close to
+    the polling interval, a poll gets the previous tick's result."""
+
+    def decorator(func):
+        pending = {}
+        cache = {}
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            key = (id(self), args, tuple(sorted(kwargs.items())))
+            try:
+                hash(key)
+            except TypeError:
+                return await func(self, *args, **kwargs)
+
+            now = time.monotonic()
+            if key in cache:
+                expiry, result = cache[key]
+                if expiry > now:
+                    return result
+                del cache[key]
+
+            if key not in pending:
+                future = asyncio.ensure_future(func(self, *args, **kwargs))
+                pending[key] = future
+
+                def done(future):
+                    del pending[key]
+                    if not future.cancelled() and future.exception() is None:
+                        for old_key in [old_key for old_key, (expiry, _)
+                                        in cache.items() if expiry <= now]:
+                            del cache[old_key]
+                        cache[key] = (time.monotonic() + ttl, future.result())
+
+                future.add_done_callback(done)
+
+            # Shield the shared call so a caller timing out doesn't cancel it
+            # for everyone else
+            return await asyncio.shield(pending[key])
+
+        return wrapper
+    return decorator
+
+
+class Membership:
+    """Tracks the worker processes that poll watches, so that targets can be
+    split between them.
+
+    Each worker heartbeats into the watch:workers sorted set, and workers
+    that stop heartbeating are dropped after TTL seconds. Every target is
+    assigned to one live worker by rendezvous hashing, so targets move
+    automatically (and only as far as needed) when workers join or die."""
+
+    HEARTBEAT = 15
+    TTL = 45
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.redis = bot.redis
+        self.id = os.getenv("WATCH_WORKER_ID") or str(uuid.uuid4())
+
+        self.workers = [self.id]
+        self.task = None
+
+        @self.bot.listen()
+        async def on_ready():
+            self.start()
+
+    def start(self):
+        # on_ready is dispatched again after reconnects. Processes that
+        # don't poll must not be handed any targets.
+        if self.task or not self.bot.polls_watches:
+            return
+
+        self.task = asyncio.create_task(self.heartbeat())
+
+    async def heartbeat(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                traceback.print_exc()
+            await asyncio.sleep(self.HEARTBEAT)
+
+    async def refresh(self):
+        now = time.time()
+
+        pipe = self.redis.pipeline()
+        pipe.zadd("watch:workers", now, self.id)
+        pipe.zremrangebyscore("watch:workers", max=now - self.TTL)
+        pipe.zrange("watch:workers")
+        *_, workers = await pipe.execute()
+
+        self.workers = sorted(set(workers) | {self.id})
+
+    def owns(self, target):
+        "Whether this worker is responsible for polling a target."
+        if len(self.workers) == 1:
+            return True
+
+        def weight(worker):
+            return hashlib.sha1(f"{worker}:{target}".encode()).digest()
+
+        return max(self.workers, key=weight) == self.id
+
 
 class Watchable:
     async def check_target(self, target):
@@ -27,20 +153,304 @@ class Watchable:
 
 
 class Watch:
-    def __init__(self, cog, crontab="*/1 * * * *"):
+    # Stages of a tick that are timed, and how many samples of each we keep
+    STAGES = watch_stats.STAGES
+    SAMPLES = 1000
+
+    # Seconds of leeway when deciding whether a target is due, so that
+    # targets scheduled for (almost) exactly this tick are not pushed back
+    SCHEDULE_SLACK = 5
+
+    # KEYS: leases
+    # ARGV: worker ID
+    RELEASE = Script("""
+for _, key in ipairs(KEYS) do
+    if redis.call("GET", key) == ARGV[1] then
+        redis.call("DEL", key)
+    end
+end
+return {"ok"}
+""")
+
+    # KEYS: leases
+    # ARGV: worker ID, seconds until they expire
+    RENEW = Script("""
+for _, key in ipairs(KEYS) do
+    if redis.call("GET", key) == ARGV[1] then
+        redis.call("EXPIRE", key, ARGV[2])
+    end
+end
+return {"ok"}
+""")
+
+    def __init__(self, cog, crontab="*/1 * * * *", concurrency=8, timeout=60,
+                 min_interval=None, max_interval=None):
         self.name = cog.qualified_name
         self.cog = cog
         self.bot = self.cog.bot
         self.redis = self.bot.redis
         self.crontab = crontab
 
+        # Maximum number of targets polled at once, and the number of seconds
+        # a single target may take before it is skipped for this tick
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+        # If set, each target gets its own polling interval (in seconds)
+        # between these bounds, and the crontab only sets how often we check
+        # for targets that are due. Otherwise every target is polled on
+        # every tick.
+        self.min_interval = min_interval
+        self.max_interval = max_interval or min_interval
+
+        # Timings (in seconds) recorded since they were last saved to Redis
+        self.samples = collections.defaultdict(list)
+
         self.start_listeners()
 
         self.cron = aiocron.crontab(self.crontab, func=self.watch, start=False)
 
         @self.bot.listen()
         async def on_ready():
-            self.cron.start()
+            if self.bot.polls_watches:
+                self.cron.start()
+
+    def record(self, stage, duration):
+        self.samples[stage].append(round(duration, 4))
+
+    @contextlib.contextmanager
+    def timed(self, stage):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(stage, time.monotonic() - start)
+
+    async def check(self, target):
+        "Fetch the current state and hash of a target."
+        with self.timed("state"):
+            state = await self.cog.get_state(target)
+        with self.timed("hash"):
+            return state, await self.cog.get_hash(state)
+
+    async def poll(self, targets, callback):
+        """Check each target concurrently, then await
+        callback(target, state, new_hash) for each one that succeeded.
+
+        Returns a mapping of target -> seconds taken for the targets that
+        succeeded, and a list of the targets that failed."""
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        durations = {}
+        failed = []
+
+        async def poll_target(target):
+            async with semaphore:
+                start = time.monotonic()
+                try:
+                    state, new_hash = await asyncio.wait_for(
+                        self.check(target), self.timeout)
+                    durations[target] = round(time.monotonic() - start, 4)
+                    await callback(target, state, new_hash)
+                except asyncio.TimeoutError:
+                    print(f"Watch {self.name}: timed out polling {target}")
+                    failed.append(target)
+                except Exception:
+                    print(f"Watch {self.name}: error polling {target}")
+                    traceback.print_exc()
+                    failed.append(target)
+
+        await asyncio.gather(*(poll_target(target) for target in targets))
+
+        return durations, failed
+
+    async def get_hashes(self, targets):
+        "Fetch the stored hash of each target in a single round trip."
+        if not targets:
+            return {}
+
+        keys = [f"watch:{self.name}:hash:{target}" for target in targets]
+        return dict(zip(targets, await self.redis.mget(*keys)))
+
+    async def set_hashes(self, hashes):
+        "Store the hash of each target in a single round trip."
+        if not hashes:
+            return
+
+        pairs = []
+        for target, hash in hashes.items():
+            pairs.extend((f"watch:{self.name}:hash:{target}", hash))
+        await self.redis.mset(*pairs)
+
+    async def get_members(self, targets):
+        "Fetch the set of subscribers of each target in a single round trip."
+        targets = list(targets)
+        if not targets:
+            return {}
+
+        pipe = self.redis.pipeline()
+        for target in targets:
+            pipe.smembers(f"watch:{self.name}:target:{target}")
+        with self.timed("redis"):
+            return dict(zip(targets, await pipe.execute()))
+
+    async def get_due(self, targets, now):
+        "Filter targets down to the ones scheduled to be polled by now."
+        if not self.min_interval or not targets:
+            return targets
+
+        pipe = self.redis.pipeline()
+        for target in targets:
+            pipe.zscore(f"watch:{self.name}:schedule", target)
+        scores = await pipe.execute()
+
+        return [target for target, score in zip(targets, scores)
+                if score is None or score <= now + self.SCHEDULE_SLACK]
+
+    async def reschedule(self, targets, changed, now):
+        """Poll targets that changed again after min_interval, and back off
+        the interval of targets that didn't up to max_interval."""
+        if not self.min_interval or not targets:
+            return
+
+        intervals = await self.redis.hmget(
+            f"watch:{self.name}:interval", *targets)
+
+        pipe = self.redis.pipeline()
+        for target, interval in zip(targets, intervals):
+            if target in changed or interval is None:
+                interval = self.min_interval
+            else:
+                interval = min(self.max_interval, float(interval) * 1.5)
+
+            pipe.hset(f"watch:{self.name}:interval", target, interval)
+            pipe.zadd(f"watch:{self.name}:schedule", now + interval, target)
+        await pipe.execute()
+
+    async def claim(self, targets):
+        """Filter targets down to the ones this worker owns, and take a lease
+        on each of them.
+
+        The lease is held until the targets have been rescheduled, so workers
+        that briefly disagree about ownership while rebalancing, and ticks
+        that overlap because the previous one ran long, still can't poll the
+        same target twice. It expires after the poll timeout, and renew keeps
+        it from expiring while the tick is running, so that it only runs out
+        if this worker dies first."""
+
+        membership = self.bot.membership
+        targets = [target for target in targets if membership.owns(target)]
+        if not targets:
+            return targets
+
+        pipe = self.redis.pipeline()
+        for target in targets:
+            pipe.set(f"watch:{self.name}:lease:{target}", membership.id,
+                     expire=self.timeout, exist=self.redis.SET_IF_NOT_EXIST)
+        leases = await pipe.execute()
+
+        return [target for target, leased in zip(targets, leases) if leased]
+
+    async def renew(self, targets):
+        "Keep extending the leases taken by claim until cancelled."
+        while True:
+            await asyncio.sleep(self.timeout / 3)
+            try:
+                await self.RENEW(
+                    self.redis,
+                    [f"watch:{self.name}:lease:{target}"
+                     for target in targets],
+                    [self.bot.membership.id, self.timeout])
+            except Exception:
+                traceback.print_exc()
+
+    async def release(self, targets):
+        "Give up the leases taken by claim, unless they have been taken over."
+        if not targets:
+            return
+
+        await self.RELEASE(
+            self.redis,
+            [f"watch:{self.name}:lease:{target}" for target in targets],
+            [self.bot.membership.id])
+
+    async def forget(self, target):
+        "Drop the schedule and statistics kept for a target."
+        pipe = self.redis.pipeline()
+        pipe.zrem(f"watch:{self.name}:schedule", target)
+        for field in ("interval", "duration", "errors", "last_success"):
+            pipe.hdel(f"watch:{self.name}:{field}", target)
+        await pipe.execute()
+
+    async def save_stats(self, durations, failed, now):
+        """Write the timings recorded since the last save, and the duration,
+        error count and last successful poll of each target."""
+
+        samples, self.samples = self.samples, collections.defaultdict(list)
+
+        pipe = self.redis.pipeline()
+        pipe.sadd("watch:list", self.name)
+
+        for stage, values in samples.items():
+            pipe.lpush(f"watch:{self.name}:timings:{stage}", *values)
+            pipe.ltrim(f"watch:{self.name}:timings:{stage}",
+                       0, self.SAMPLES - 1)
+
+        if durations:
+            pipe.hmset_dict(f"watch:{self.name}:duration", durations)
+            pipe.hmset_dict(f"watch:{self.name}:last_success",
+                            {target: now for target in durations})
+
+        for target in failed:
+            pipe.hincrby(f"watch:{self.name}:errors", target, 1)
+
+        await pipe.execute()
+
+    async def get_stats(self):
+        "Summarize the saved timings and per-target statistics."
+        return await watch_stats.get_stats(self.redis, self.name)
+
+    async def watch(self):
+        start = time.monotonic()
+        now = time.time()
+
+        with self.timed("redis"):
+            targets = await self.get_due(list(
+                await self.redis.smembers(f"watch:{self.name}:targets")), now)
+            targets = await self.claim(targets)
+            old_hashes = await self.get_hashes(targets)
+
+        changed = {}
+
+        async def update(target, state, new_hash):
+            new_hash = str(new_hash)
+            if old_hashes.get(target) != new_hash:
+                response = await self.cog.get_response(state)
+                changed[target] = (new_hash, response)
+
+        renewal = asyncio.create_task(self.renew(targets))
+        try:
+            durations, failed = await self.poll(targets, update)
+
+            with self.timed("redis"):
+                await self.reschedule(targets, changed, now)
+                await self.set_hashes(
+                    {target: hash for target, (hash, _) in changed.items()})
+        finally:
+            renewal.cancel()
+            await self.release(targets)
+
+        if changed:
+            await self.notify(
+                {target: response
+                 for target, (_, response) in changed.items()})
+
+        self.record("tick", time.monotonic() - start)
+        await self.save_stats(durations, failed, now)
+
+    async def notify(self, responses):
+        "Deliver a mapping of target -> Response to each target's subscribers"
+        pass
 
 
 class ChannelWatch(Watch):
@@ -73,6 +483,7 @@ class ChannelWatch(Watch):
         card = await self.redis.scard(f"watch:{self.name}:target:{target}")
         if int(card) < 1:
             await self.redis.srem(f"watch:{self.name}:targets", target)
+            await self.forget(target)
 
         await self.redis.srem(
             f"watch:{self.name}:channel:{channel.id}", target)
@@ -89,34 +500,158 @@ class ChannelWatch(Watch):
         targets = await self.get_targets(channel)
         return await self.cog.human_targets(targets)
 
-    async def watch(self):
-        for target in await self.redis.smembers(f"watch:{self.name}:targets"):
-            state = await self.cog.get_state(target)
-            new_hash = await self.cog.get_hash(state)
+    async def notify(self, responses):
+        members = await self.get_members(responses)
 
-            old_hash = await self.redis.get(f"watch:{self.name}:hash:{target}")
-            if old_hash != new_hash:
-                response = await self.cog.get_response(state)
+        for target, response in responses.items():
+            for channel_id in members[target]:
+                self.bot.delivery.put(self, target, channel_id, response)
+
+
+class MessageEditor:
+    """Coalesces edits to the messages of a MessageWatch.
+
+    A message that hasn't been edited in the last WINDOW seconds is edited
+    straight away. Further updates within the window are merged, so only the
+    latest state is written once the window is over. Edits go through
+    PartialMessage, so the message never has to be fetched first."""
+
+    WINDOW = 5
 
-                await self.redis.set(
-                    f"watch:{self.name}:hash:{target}", new_hash)
+    def __init__(self, watch):
+        self.watch = watch
 
-                for channel_id in await self.redis.smembers(
-                        f"watch:{self.name}:target:{target}"):
-                    channel = self.bot.get_channel(int(channel_id))
+        self.pending = {}
+        self.last_edit = {}
+        self.tasks = set()
 
-                    if not channel:
-                        await self.unregister(
-                            discord.Object(int(channel_id)), target)
-                    await response.send_to(channel)
+    def edit(self, channel, message_id, response):
+        message_id = int(message_id)
+
+        if message_id in self.pending:
+            # Drop the intermediate state, the scheduled flush will pick up
+            # the latest one
+            self.pending[message_id] = (channel, response)
+            return
+
+        self.pending[message_id] = (channel, response)
+
+        delay = (self.last_edit.get(message_id, 0) + self.WINDOW
+                 - time.monotonic())
+        task = asyncio.create_task(self.flush(message_id, max(0, delay)))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def flush(self, message_id, delay):
+        await asyncio.sleep(delay)
+
+        channel, response = self.pending.pop(message_id)
+
+        # Edits from longer than a window ago don't delay anything anymore
+        now = time.monotonic()
+        for old_id in [old_id for old_id, edited in self.last_edit.items()
+                       if edited < now - self.WINDOW]:
+            del self.last_edit[old_id]
+        self.last_edit[message_id] = now
+
+        try:
+            with self.watch.timed("send"):
+                await response.send_to(
+                    channel.get_partial_message(message_id))
+        except discord.NotFound:
+            # The message was deleted while we weren't listening
+            await self.watch.unregister(channel.id, message_id)
+        except Exception:
+            print(f"Watch {self.watch.name}: error editing {message_id}")
+            traceback.print_exc()
 
 
 class MessageWatch(Watch):
+    """Keeps messages up to date with the state of their target.
+
+    Registered messages are stored in the watch:<name>:registry hash, which
+    maps each message ID to "<channel ID>:<guild ID>:<target>", and indexed
+    by guild in the watch:<name>:registry:<guild ID> sets."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.editor = MessageEditor(self)
+
     def start_listeners(self):
         @self.bot.listen()
         async def on_raw_message_delete(payload):
             await self.unregister(payload.channel_id, payload.message_id)
 
+        @self.bot.listen()
+        async def on_ready():
+            await self.migrate()
+
+    @staticmethod
+    def pack(channel_id, guild_id, target):
+        return f"{channel_id}:{guild_id}:{target}"
+
+    @staticmethod
+    def unpack(entry):
+        channel_id, guild_id, target = entry.split(":", 2)
+        return int(channel_id), int(guild_id), target
+
+    async def migrate(self):
+        """Move messages registered with the old layout (a messages set, a
+        set per guild and two string keys per message) into the registry,
+        and build the guild index for registries that predate it."""
+
+        await self.migrate_layout()
+
+        if await self.redis.sismember("watch:registry:indexed", self.name):
+            return
+
+        registry = await self.redis.hgetall(f"watch:{self.name}:registry")
+
+        pipe = self.redis.pipeline()
+        for message_id, entry in registry.items():
+            _, guild_id, _ = self.unpack(entry)
+            pipe.sadd(f"watch:{self.name}:registry:{guild_id}", message_id)
+        pipe.sadd("watch:registry:indexed", self.name)
+        await pipe.execute()
+
+    async def migrate_layout(self):
+        message_ids = list(
+            await self.redis.smembers(f"watch:{self.name}:messages"))
+        if not message_ids:
+            return
+
+        pipe = self.redis.pipeline()
+        for message_id in message_ids:
+            pipe.get(f"watch:{self.name}:message:{message_id}:channel")
+            pipe.get(f"watch:{self.name}:message:{message_id}:target")
+        values = await pipe.execute()
+
+        registry = {}
+        for message_id, channel_id, target in zip(
+                message_ids, values[::2], values[1::2]):
+            if channel_id is None or target is None:
+                continue
+
+            channel = self.bot.get_channel(int(channel_id))
+            guild_id = channel.guild.id if channel else 0
+            registry[message_id] = self.pack(channel_id, guild_id, target)
+
+        old_keys = [f"watch:{self.name}:messages"]
+        for message_id in message_ids:
+            old_keys.append(f"watch:{self.name}:message:{message_id}:channel")
+            old_keys.append(f"watch:{self.name}:message:{message_id}:target")
+        async for key in self.redis.iscan(
+                match=f"watch:{self.name}:guild:*:messages"):
+            old_keys.append(key)
+
+        pipe = self.redis.pipeline()
+        if registry:
+            pipe.hmset_dict(f"watch:{self.name}:registry", registry)
+        pipe.delete(*old_keys)
+        await pipe.execute()
+
+        print(f"Watch {self.name}: migrated {len(registry)} messages")
+
     async def register(self, channel, target):
         state = await self.cog.get_state(target)
         response = await self.cog.get_response(state)
@@ -127,85 +662,84 @@ class MessageWatch(Watch):
             hash = await self.cog.get_hash(state)
             await self.redis.set(f"watch:{self.name}:hash:{target}", hash)
 
-        await self.redis.sadd(f"watch:{self.name}:targets", target)
-        await self.redis.sadd(f"watch:{self.name}:messages", message.id)
-        await self.redis.sadd(f"watch:{self.name}:target:{target}", message.id)
-        await self.redis.sadd(
-            f"watch:{self.name}:guild:{channel.guild.id}:messages", message.id)
-        await self.redis.set(
-            f"watch:{self.name}:message:{message.id}:target", target)
-        await self.redis.set(
-            f"watch:{self.name}:message:{message.id}:channel", channel.id)
+        pipe = self.redis.pipeline()
+        pipe.sadd(f"watch:{self.name}:targets", target)
+        pipe.sadd(f"watch:{self.name}:target:{target}", message.id)
+        pipe.hset(f"watch:{self.name}:registry", message.id,
+                  self.pack(channel.id, channel.guild.id, target))
+        pipe.sadd(f"watch:{self.name}:registry:{channel.guild.id}",
+                  message.id)
+        await pipe.execute()
 
     async def unregister(self, channel_id, message_id):
-        if not await self.redis.sismember(
-                f"watch:{self.name}:messages", message_id):
+        entry = await self.redis.hget(
+            f"watch:{self.name}:registry", message_id)
+        if entry is None:
             return
 
-        channel = self.bot.get_channel(channel_id)
+        _, guild_id, target = self.unpack(entry)
 
-        target = await self.redis.get(
-            f"watch:{self.name}:message:{message_id}:target")
+        pipe = self.redis.pipeline()
+        pipe.hdel(f"watch:{self.name}:registry", message_id)
+        pipe.srem(f"watch:{self.name}:registry:{guild_id}", message_id)
+        pipe.srem(f"watch:{self.name}:target:{target}", message_id)
+        pipe.scard(f"watch:{self.name}:target:{target}")
+        *_, card = await pipe.execute()
 
-        await self.redis.srem(f"watch:{self.name}:target:{target}", message_id)
-        if channel:
-            await self.redis.srem(
-                f"watch:{self.name}:guild:{channel.guild.id}:messages",
-                message_id)
-
-        card = await self.redis.scard(f"watch:{self.name}:target:{target}")
         if int(card) < 1:
             await self.redis.srem(f"watch:{self.name}:targets", target)
             await self.redis.delete(f"watch:{self.name}:hash:{target}")
-
-        await self.redis.delete(
-            f"watch:{self.name}:message:{message_id}:target")
-        await self.redis.delete(
-            f"watch:{self.name}:message:{message_id}:channel")
+            await self.forget(target)
 
     async def get_targets(self, guild):
         targets = []
 
-        for message_id in await self.redis.smembers(
-                f"watch:{self.name}:guild:{guild.id}:messages"):
+        message_ids = list(await self.redis.smembers(
+            f"watch:{self.name}:registry:{guild.id}"))
+        if not message_ids:
+            return targets
 
-            new_target = {
-                "message_id": message_id,
-                "channel_id": await self.redis.get(
-                    f"watch:{self.name}:message:{message_id}:channel"),
-                "target": await self.redis.get(
-                    f"watch:{self.name}:message:{message_id}:target")
-            }
+        entries = await self.redis.hmget(
+            f"watch:{self.name}:registry", *message_ids)
+        for message_id, entry in zip(message_ids, entries):
+            if entry is None:
+                continue
+            channel_id, _, target = self.unpack(entry)
 
-            targets.append(new_target)
+            targets.append({
+                "message_id": message_id,
+                "channel_id": channel_id,
+                "target": target
+            })
 
         return targets
 
     async def human_targets(self, guild):
         return await self.get_targets(guild)
 
-    async def watch(self):
-        for target in await self.redis.smembers(f"watch:{self.name}:targets"):
-            state = await self.cog.get_state(target)
-            new_hash = await self.cog.get_hash(state)
-
-            old_hash = await self.redis.get(f"watch:{self.name}:hash:{target}")
-            if old_hash != new_hash:
-                response = await self.cog.get_response(state)
-
-                await self.redis.set(
-                    f"watch:{self.name}:hash:{target}", new_hash)
+    async def notify(self, responses):
+        members = await self.get_members(responses)
 
-                for message_id in await self.redis.smembers(
-                        f"watch:{self.name}:target:{target}"):
-                    channel_id = await self.redis.get(
-                        f"watch:{self.name}:message:{message_id}:channel")
+        message_ids = [message_id for message_ids in members.values()
+                       for message_id in message_ids]
+        if not message_ids:
+            return
 
-                    channel = self.bot.get_channel(int(channel_id))
+        with self.timed("redis"):
+            entries = dict(zip(message_ids, await self.redis.hmget(
+                f"watch:{self.name}:registry", *message_ids)))
 
-                    if not channel:
-                        await self.unregister(channel_id, message_id)
+        for target, response in responses.items():
+            for message_id in members[target]:
+                entry = entries[message_id]
+                if entry is None:
+                    await self.redis.srem(
+                        f"watch:{self.name}:target:{target}", message_id)
+                    continue
 
-                    message = await channel.fetch_message(int(message_id))
+                channel = self.bot.get_channel(self.unpack(entry)[0])
+                if not channel:
+                    await self.unregister(None, message_id)
+                    continue
 
-                    await response.send_to(message)
+                self.editor.edit(channel, message_id, response)
@@ -0,0 +1,43 @@
+# Reads the statistics that watches save to Redis. This only needs the Redis
+# client, so the API shares it with the bot.
+
+# Stages of a tick that are timed
+STAGES = ("tick", "state", "hash", "redis", "send")
+
+
+def percentile(samples, percent):
+    "Nearest-rank percentile of a list of numbers."
+    if not samples:
+        return None
+
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * percent / 100))]
+
+
+async def get_stats(redis, name):
+    """Summarize the saved timings of a watch, along with the duration of
+    the last successful poll, the error count and the time of the last
+    successful poll of each target."""
+
+    pipe = redis.pipeline()
+    for stage in STAGES:
+        pipe.lrange(f"watch:{name}:timings:{stage}", 0, -1)
+    pipe.hgetall(f"watch:{name}:duration")
+    pipe.hgetall(f"watch:{name}:errors")
+    pipe.hgetall(f"watch:{name}:last_success")
+    *timings, durations, errors, last_success = await pipe.execute()
+
+    return {
+        "timings": {
+            stage: {
+                "p50": percentile([float(v) for v in values], 50),
+                "p95": percentile([float(v) for v in values], 95)
+            } for stage, values in zip(STAGES, timings)
+        },
+        "durations": {target: float(duration)
+                      for target, duration in durations.items()},
+        "errors": {target: int(count)
+                   for target, count in errors.items()},
+        "last_success": {target: float(ts)
+                         for target, ts in last_success.items()}
+    }
@@ -1,26 +1,106 @@
 import asyncio
+import random
+import traceback
 
 import aiohttp
 
 
 class Portal:
-    def __init__(self, url, id, token):
+    """Client for a Breqbot portal.
+
+    Requests are handled concurrently, up to max_jobs at a time, while the
+    connection keeps being read. Async callbacks are awaited, and others run
+    in executor: the default thread pool if it is None, or any
+    concurrent.futures executor (a ProcessPoolExecutor needs the callback
+    to be a module-level function).
+
+    If the connection drops, the client reconnects with exponential backoff
+    and tells the server which jobs it is still working on, so that the
+    rest are delivered again. Responses that could not be sent are kept
+    and sent after reconnecting."""
+
+    # Seconds to wait before the first reconnect, doubling up to MAX_BACKOFF
+    BACKOFF = 1
+    MAX_BACKOFF = 60
+
+    # The server pings every second, so a silent connection is a dead one
+    RECEIVE_TIMEOUT = 10
+
+    def __init__(self, url, id, token, executor=None, max_jobs=4):
         self.url = url
         self.id = id
         self.token = token
 
+        self.executor = executor
+        self.max_jobs = max_jobs
+        self.tasks = set()
+
+        self.session = None
+        self.socket = None
+        self.failures = 0
+
+        # Job ID -> query, for requests that haven't been answered yet
+        self.running = {}
+        self.unsent = []
+
     async def connect(self):
         self.session = aiohttp.ClientSession()
         self.socket = await self.session.ws_connect(f"{self.url}portal")
 
         await self.auth()
+
+        unsent, self.unsent = self.unsent, []
+        for response in unsent:
+            await self.send(response)
+
+        await self.resume()
         await self.set_status(2)
 
+    async def disconnect(self):
+        if self.session:
+            await self.session.close()
+        self.session = self.socket = None
+
     async def handle(self):
-        await self.connect()
+        self.slots = asyncio.Semaphore(self.max_jobs)
+
+        while True:
+            try:
+                await self.connect()
+                await self.receive()
+            except (aiohttp.ClientError, ConnectionError,
+                    asyncio.TimeoutError) as e:
+                print(f"Portal connection lost: {e!r}")
+            finally:
+                await self.disconnect()
+
+            delay = min(self.MAX_BACKOFF, self.BACKOFF * 2 ** self.failures)
+            self.failures += 1
+
+            # Don't have every portal reconnect at the same moment
+            await asyncio.sleep(delay * random.uniform(0.5, 1))
+
+    async def receive(self):
         while True:
-            message = await self.socket.receive_json()
-            await self.handle_request(message)
+            message = await self.socket.receive(timeout=self.RECEIVE_TIMEOUT)
+            if message.type != aiohttp.WSMsgType.TEXT:
+                raise ConnectionError(f"Websocket closed ({message.type})")
+
+            # Only a connection the server keeps talking on counts as a
+            # success: one that is closed after auth (e.g. for a bad token)
+            # must keep backing off
+            self.failures = 0
+
+            try:
+                message = message.json()
+            except ValueError:
+                print(f"Ignoring malformed message: {message.data!r}")
+                continue
+
+            # Keep reading (and answering pings) while requests run
+            task = asyncio.create_task(self.handle_request(message))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
 
     async def auth(self):
         message = {
@@ -30,6 +110,22 @@ class Portal:
         }
         await self.socket.send_json(message)
 
+    async def resume(self):
+        message = {
+            "type": "resume",
+            "jobs": list(self.running)
+        }
+        await self.socket.send_json(message)
+
+    async def send(self, response):
+        "Send a response now, or after reconnecting if that fails."
+        try:
+            if self.socket is None or self.socket.closed:
+                raise ConnectionError("Websocket closed")
+            await self.socket.send_json(response)
+        except (aiohttp.ClientError, ConnectionError, RuntimeError):
+            self.unsent.append(response)
+
     async def set_status(self, status):
         message = {
             "type": "status",
@@ -43,14 +139,33 @@ class Portal:
         elif message["type"] != "query":
             return
 
-        result = self.request_callback(message["data"])
+        # The server may deliver a job again if it missed our resume
+        if message["job"] in self.running:
+            return
+        self.running[message["job"]] = message
+
+        async with self.slots:
+            try:
+                result = await self.call(message["data"])
+            except Exception as e:
+                traceback.print_exc()
+                result = {"title": "Error",
+                          "description": f"{type(e).__name__}: {e}"}
 
         response = {
             "type": "response",
             "job": message["job"],
             "data": result
         }
-        await self.socket.send_json(response)
+        del self.running[message["job"]]
+        await self.send(response)
+
+    async def call(self, data):
+        if asyncio.iscoroutinefunction(self.request_callback):
+            return await self.request_callback(data)
+
+        return await asyncio.get_event_loop().run_in_executor(
+            self.executor, self.request_callback, data)
 
     def on_request(self):
         def decorator(func):
@@ -11,7 +11,8 @@ from portal import Portal
 portal = Portal(
     os.getenv("PORTAL_URL"),
     os.getenv("PORTAL_ID_MATRIX"),
-    os.getenv("PORTAL_TOKEN_MATRIX")
+    os.getenv("PORTAL_TOKEN_MATRIX"),
+    max_jobs=1  # There's only one camera
 )
 
 